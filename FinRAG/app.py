@@ -1,25 +1,52 @@
+import time
+_import_started = time.perf_counter()
+
 import streamlit as st
 import uuid
-import time
 from finrag.astradb_vectorstore import FinRAGVectorStore
 from finrag.retriever import FinRAGRetriever
-from finrag.model_factory import get_llm
-from finrag.ingest_service import ingest_file
-from finrag.prompt_templates import FINRAG_PROMPT
+from finrag.model_factory import (
+    get_llm,
+    get_llm_components,
+    stream_llm,
+    inference_metrics,
+    warm_up_llm,
+    llm_ready,
+    llm_load_seconds
+)
+from finrag.ingest_jobs import get_ingest_jobs
+from finrag.session_reaper import get_session_reaper
+from finrag.prompt_templates import FINRAG_PROMPT, render_prompt_prefix
+from finrag.postprocess import clean_answer, clean_answer_stream
+from finrag.context_builder import build_context
+from finrag.answer_cache import get_answer_cache
+from finrag.summarizer import asks_for_document_summary, get_summarizer, PENDING, RUNNING, READY
+from config import (
+    STREAM_ANSWERS,
+    CONTEXT_TOKEN_BUDGET,
+    CHUNK_OVERLAP,
+    PREFILL_MS_PER_TOKEN_ESTIMATE,
+    ANSWER_CACHE_ENABLED,
+    SUMMARY_ENABLED
+)
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 # Setup
 st.set_page_config(page_title="FinRAG V2", page_icon="📈", layout="wide")
 st.title("📈 FinRAG: Strict Financial Analysis")
 
 # Initialize components
+# The LLM loads on a background thread: the page renders without waiting for it
+warm_up_llm()
+if "startup_reported" not in st.session_state:
+    st.session_state.startup_reported = True
+    print(f"Startup: app imports took {IMPORT_SECONDS:.2f}s (LLM warming up in background)")
+
 @st.cache_resource
 def get_system():
     vs = FinRAGVectorStore()
     retriever = FinRAGRetriever(vs)
-    llm = get_llm()
-    return retriever, llm
-
-retriever_obj, llm = get_system()
+    return retriever
 
 # Sidebar
 with st.sidebar:
@@ -33,26 +60,72 @@ with st.sidebar:
     uploaded_file = st.file_uploader("Upload Financial Doc", type=["pdf", "csv", "xlsx", "txt"])
     
     if uploaded_file and st.button("Ingest Document"):
-        with st.spinner("Step 1: Ingesting & Cleaning Storage..."):
-            try:
-                # Step 0: Session Creation
-                new_session_id = str(uuid.uuid4())
-                st.session_state.session_id = new_session_id
-                
-                # Clear chat history
-                st.session_state.messages = [{"role": "assistant", "content": "Document Processed. Session Started."}]
-                
-                # Step 1 & 12: Ingestion + Cleanup
-                count = ingest_file(uploaded_file, uploaded_file.name, USER_ID, new_session_id)
-                st.success(f"Ingested {count} chunks. Trace ID: {new_session_id}")
-            except Exception as e:
-                st.error(f"Ingestion failed: {e}")
-    
+        try:
+            # Step 0: Session Creation
+            new_session_id = str(uuid.uuid4())
+
+            # Step 1 & 12: Ingestion + Cleanup, as a background job (chat stays responsive)
+            st.session_state.ingest_job_id = get_ingest_jobs().submit(
+                uploaded_file, uploaded_file.name, USER_ID, new_session_id
+            )
+            st.session_state.session_id = new_session_id
+
+            # Clear chat history
+            st.session_state.messages = [{"role": "assistant", "content": "Document queued for ingestion. Session Started."}]
+        except Exception as e:
+            st.error(f"Ingestion failed: {e}")
+
+    @st.fragment(run_every=1.0)
+    def ingest_status():
+        """
+        Polls the background ingestion job; only this fragment reruns while it is active.
+        """
+        job_id = st.session_state.get("ingest_job_id")
+        job = get_ingest_jobs().get(job_id) if job_id else None
+        if job is None:
+            return
+
+        progress = job.progress
+        st.caption(
+            f"{job.filename}: {job.status} | Parsed: {progress['parse']} pages | Chunked: {progress['chunk']} | "
+            f"Embedded: {progress['embed']} | Stored: {progress['store']} | "
+            f"Unchanged: {progress['unchanged']}"
+        )
+        if not job.done:
+            if st.button("Cancel ingestion"):
+                get_ingest_jobs().cancel(job_id)
+        elif job.status == "done":
+            st.success(f"Ingested {job.chunks} chunks. Trace ID: {job.session_id}")
+        elif job.status == "failed":
+            st.error(f"Ingestion failed: {job.error}")
+        else:
+            st.warning("Ingestion cancelled. Chunks stored so far remain searchable.")
+
+    ingest_status()
+
     if st.session_state.session_id:
         st.info(f"Active Session: {st.session_state.session_id}")
     else:
         st.warning("No active document session.")
 
+    if llm_ready():
+        st.caption(f"LLM ready (loaded in {llm_load_seconds():.1f}s) | App imports: {IMPORT_SECONDS:.2f}s")
+        with st.expander("Inference metrics"):
+            metrics = inference_metrics()
+            st.caption(
+                f"Queue depth: {metrics['queue_depth']} | Batches: {metrics['batches']} "
+                f"(mean size {metrics['mean_batch_size']:.1f}) | {metrics['tokens_per_s']:.1f} tokens/s | "
+                f"Mean queue wait: {metrics['mean_queue_wait_ms']:.0f} ms"
+            )
+    else:
+        st.caption(f"LLM warming up in the background... | App imports: {IMPORT_SECONDS:.2f}s")
+
+    reaper = get_session_reaper().stats()
+    st.caption(
+        f"Session cleanup: {reaper['reclaimed_chunks']} chunks reclaimed from "
+        f"{reaper['reaped_sessions']} expired sessions | {reaper['sessions']} active"
+    )
+
     st.markdown("---")
     st.caption("FinRAG v3.5 | Architecture v2 | Strict Mode")
 
@@ -71,43 +144,88 @@ if prompt := st.chat_input("Ask a financial question..."):
         st.markdown(prompt)
 
     with st.chat_message("assistant"):
+        if not st.session_state.session_id:
+             st.error("Please upload a document to start a session.")
+             st.stop()
+
+        # Last access for the session TTL (cleanup runs in the background reaper)
+        get_session_reaper().touch(USER_ID, st.session_state.session_id)
+        retriever_obj = get_system()
+
+        # Semantic answer cache: near-identical questions (same years / amounts) in this session
+        # skip retrieval + generation
+        started = time.perf_counter()
+        query_embedding = retriever_obj.embed_query(prompt)
+        cached = None
+        if ANSWER_CACHE_ENABLED:
+            cached = get_answer_cache().lookup(USER_ID, st.session_state.session_id, query_embedding, prompt)
+        if cached:
+            st.markdown(cached.answer)
+            st.caption(
+                f"⚡ Cached answer (similar to \"{cached.question}\", similarity {cached.similarity:.2f}, "
+                f"{len(cached.chunk_ids)} source chunks) served in {(time.perf_counter() - started) * 1000:.0f} ms"
+            )
+            st.session_state.messages.append({"role": "assistant", "content": cached.answer})
+            st.stop()
+
+        # Whole-document summary requests: answer from the summary precomputed after ingestion
+        # (other SUMMARY-intent questions, e.g. "What does the report say about Note 14?", are retrieved)
+        if SUMMARY_ENABLED and asks_for_document_summary(prompt):
+            summary = get_summarizer().get(USER_ID, st.session_state.session_id)
+            if summary and summary.status == READY:
+                st.markdown(summary.text)
+                st.caption(
+                    f"📄 Precomputed summary of {summary.source} ({summary.groups} sections) "
+                    f"served in {(time.perf_counter() - started) * 1000:.0f} ms"
+                )
+                st.session_state.messages.append({"role": "assistant", "content": summary.text})
+                st.stop()
+            if summary and summary.status in (PENDING, RUNNING):
+                st.caption("Full document summary is still being prepared; answering from the most relevant passages.")
+
         with st.spinner("Analyzing..."):
-            if not st.session_state.session_id:
-                 st.error("Please upload a document to start a session.")
-                 st.stop()
-                 
             # Step 4 & 5: Intent & Retrieval
             retrieved_docs = retriever_obj.retrieve(prompt, USER_ID, st.session_state.session_id)
             
-            # Step 7: Prompt Context Injection
-            context_text = ""
-            for d in retrieved_docs:
-                meta = d.metadata
-                source_str = f"[Doc: {meta.get('source', 'Unknown')} | Page: {meta.get('page', 'N/A')}]"
-                context_text += f"{source_str}\n{d.page_content}\n\n"
+            # Step 7: Prompt Context Injection (deduplicated, score-ordered, token-budgeted)
+            tokenizer = get_llm_components()[0]
+            context_text, ctx = build_context(
+                retrieved_docs, tokenizer, max_tokens=CONTEXT_TOKEN_BUDGET, max_overlap=2 * CHUNK_OVERLAP
+            )
+            print(
+                f"Context: {ctx['tokens_used']}/{ctx['tokens_in']} tokens from {ctx['chunks_used']}/{ctx['chunks_in']} chunks "
+                f"(budget {CONTEXT_TOKEN_BUDGET}, overlap removed {ctx['dedup_chars']} chars) | "
+                f"est. prefill saved: {ctx['tokens_trimmed'] * PREFILL_MS_PER_TOKEN_ESTIMATE:.0f} ms"
+            )
             
-            if not context_text.strip():
-                # Step 10: Explicit Disclosure (Pre-check)
-                msg = "Not explicitly specified in the document."
-                st.warning(msg)
-                st.session_state.messages.append({"role": "assistant", "content": msg})
-            else:
-                # Step 8: Answer Generation
-                try:
-                    chain = FINRAG_PROMPT | llm
-                    response = chain.invoke({"context": context_text, "question": prompt})
-                    
+        if not context_text.strip():
+            # Step 10: Explicit Disclosure (Pre-check)
+            msg = "Not explicitly specified in the document."
+            st.warning(msg)
+            st.session_state.messages.append({"role": "assistant", "content": msg})
+        else:
+            # Step 8: Answer Generation
+            try:
+                if STREAM_ANSWERS:
+                    # Tokens render as they are generated; echo cleanup runs on the stream
+                    prompt_text = FINRAG_PROMPT.invoke({"context": context_text, "question": prompt}).to_string()
+                    final_answer = st.write_stream(clean_answer_stream(stream_llm(prompt_text, prefix=render_prompt_prefix())))
+                else:
+                    with st.spinner("Generating answer..."):
+                        chain = FINRAG_PROMPT | get_llm()
+                        response = chain.invoke({"context": context_text, "question": prompt})
+
                     final_answer = response if isinstance(response, str) else response.content
-                    final_answer = final_answer.replace("```markdown", "").replace("```", "").strip()
-                    
                     # Cleanup Echo
-                    if "ANSWER:" in final_answer:
-                        final_answer = final_answer.split("ANSWER:")[-1].strip()
-                    elif "Human:" in final_answer:
-                         final_answer = final_answer.split("Human:")[-1].strip() 
-
+                    final_answer = clean_answer(final_answer)
                     st.markdown(final_answer)
-                    st.session_state.messages.append({"role": "assistant", "content": final_answer})
-                        
-                except Exception as e:
-                    st.error(f"System Error: {e}")
+
+                st.session_state.messages.append({"role": "assistant", "content": final_answer})
+                if ANSWER_CACHE_ENABLED and final_answer:
+                    get_answer_cache().put(
+                        USER_ID, st.session_state.session_id, query_embedding,
+                        prompt, final_answer, [d.id for d in retrieved_docs if d.id]
+                    )
+                    
+            except Exception as e:
+                st.error(f"System Error: {e}")
@@ -0,0 +1,77 @@
+"""
+AstraDB bulk writes: batch size x concurrency against the local stand-in collection.
+
+Each insert_many costs --latency-ms plus --per-row-ms per row (a rough model of a
+Data API round trip), and --fail-rate of requests fail part-way so the retry path is
+exercised. Reports rows/sec, p50 / p95 per-batch latency and retries, and checks that
+every row landed exactly once.
+
+    cd FinRAG && python benchmarks/bench_bulk_write.py [--rows 2000] [--latency-ms 40]
+"""
+import argparse
+import os
+import statistics
+import sys
+import uuid
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from finrag.bulk_writer import BulkWriter  # noqa: E402
+from finrag.local_collection import LocalCollection, LocalDocumentCodec  # noqa: E402
+
+DIMENSION = 384  # all-MiniLM-L6-v2
+
+
+def make_rows(count: int, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    codec = LocalDocumentCodec()
+    vectors = rng.standard_normal((count, DIMENSION)).astype(np.float32)
+    return [
+        codec.encode(
+            content=f"Synthetic chunk {i}",
+            document_id=uuid.uuid4().hex,
+            vector=vectors[i].tolist(),
+            metadata={"user_id": "bench", "session_id": "bench", "chunk_index": i},
+        )
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--per-row-ms", type=float, default=0.5)
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    parser.add_argument("--batch-sizes", default="20,50,100")
+    parser.add_argument("--concurrency", default="1,4,8")
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows)
+    print(
+        f"\n{args.rows} rows, {args.latency_ms:.0f} ms + {args.per_row_ms} ms/row per request, "
+        f"fail rate {args.fail_rate:.0%}"
+    )
+    print(f"{'batch':>6}{'workers':>9}{'rows/s':>9}{'p50 ms':>8}{'p95 ms':>8}{'retries':>9}")
+
+    baseline = None
+    for batch_size in (int(b) for b in args.batch_sizes.split(",")):
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            collection = LocalCollection(args.latency_ms, args.per_row_ms, args.fail_rate, seed=batch_size)
+            writer = BulkWriter(collection, batch_size=batch_size, concurrency=concurrency, backoff_s=0.05)
+            report = writer.write(rows)
+            assert collection.count_documents({}) == len(rows), "rows lost or duplicated"
+
+            p95 = statistics.quantiles(report.batch_ms, n=20)[-1] if len(report.batch_ms) > 1 else report.batch_ms[0]
+            baseline = baseline or report.rows_per_s
+            print(
+                f"{batch_size:>6}{concurrency:>9}{report.rows_per_s:>9.0f}"
+                f"{statistics.median(report.batch_ms):>8.0f}{p95:>8.0f}{report.retries:>9}"
+                f"   ({report.rows_per_s / baseline:.1f}x)"
+            )
+
+
+if __name__ == "__main__":
+    main()
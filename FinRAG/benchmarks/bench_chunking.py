@@ -0,0 +1,136 @@
+"""
+Chunking: CHUNK_SIZE-character recursive splitter vs the structured token chunker.
+
+Per chunker: chunk count, mean / max embedding tokens, chunks over the model's 256-token
+limit (silently truncated at embedding time), chunks with a section title, and the time
+to embed all chunks with the embedding model. Input is a synthetic filing (headings,
+numbered notes, financial tables, prose wrapped like PDF text) and any --pdf files.
+
+    cd FinRAG && python benchmarks/bench_chunking.py [--sections 60] [--pdf report.pdf ...]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.documents import Document  # noqa: E402
+from langchain_text_splitters import RecursiveCharacterTextSplitter  # noqa: E402
+
+from config import CHUNK_SIZE, CHUNK_OVERLAP, CHUNK_MAX_TOKENS, CHUNK_MIN_TOKENS, EMBEDDING_MODEL  # noqa: E402
+from finrag.chunking import StructuredChunker, hf_token_counter  # noqa: E402
+
+MODEL_MAX_TOKENS = 256
+
+PROSE = [
+    "Revenue is recognized when control of the promised goods or services is transferred to customers.",
+    "The Group continues to monitor macroeconomic conditions, including interest rates and currency movements.",
+    "Operating expenses increased primarily due to higher personnel costs and investments in technology.",
+    "Lease liabilities are measured at the present value of the remaining lease payments.",
+    "Management assessed goodwill for impairment and concluded that no impairment charge was required.",
+    "The effective tax rate decreased as a result of the utilisation of previously unrecognised losses.",
+]
+ROWS = ["Revenue", "Cost of sales", "Gross profit", "Operating expenses", "Operating income",
+        "Finance costs", "Income tax", "Net income", "Total assets", "Net debt"]
+
+
+def wrap(text: str, width: int = 90) -> str:
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}".strip()
+    return "\n".join(lines + [line])
+
+
+def make_filing(sections: int, seed: int = 3):
+    """
+    Pages of PDF-like text: ~3 sections per page, each a heading, prose and often a table.
+    """
+    rng = random.Random(seed)
+    pages, page = [], []
+    for i in range(sections):
+        heading = rng.choice([f"Note {i + 1} {rng.choice(['Leases', 'Revenue', 'Goodwill', 'Income taxes'])}",
+                              f"{i + 1}. {rng.choice(['Segment information', 'Borrowings', 'Risk management'])}",
+                              rng.choice(["CONSOLIDATED BALANCE SHEET", "CASH FLOW STATEMENT"])])
+        body = [heading, wrap(" ".join(rng.sample(PROSE, rng.randrange(2, 6))))]
+        if rng.random() < 0.6:
+            body.append("(in millions)  2024  2023")
+            for row in rng.sample(ROWS, rng.randrange(4, len(ROWS))):
+                body.append(f"{row}  {rng.randrange(100, 9999):,}  {rng.randrange(100, 9999):,}")
+        body.append(wrap(" ".join(rng.sample(PROSE, rng.randrange(1, 4)))))
+        page.append("\n".join(body))
+        if len(page) == 3:
+            pages.append(Document(page_content="\n\n".join(page), metadata={"source": "synthetic", "page": len(pages)}))
+            page = []
+    if page:
+        pages.append(Document(page_content="\n\n".join(page), metadata={"source": "synthetic", "page": len(pages)}))
+    return pages
+
+
+def load_pdf(path: str):
+    from pypdf import PdfReader
+    return [
+        Document(page_content=page.extract_text() or "", metadata={"source": os.path.basename(path), "page": i})
+        for i, page in enumerate(PdfReader(path).pages)
+    ]
+
+
+def measure(label, chunks, count_tokens, embeddings):
+    tokens = count_tokens([c.page_content for c in chunks])
+    started = time.perf_counter()
+    embeddings.embed_documents([c.page_content for c in chunks])
+    seconds = time.perf_counter() - started
+    return {
+        "label": label,
+        "chunks": len(chunks),
+        "mean": sum(tokens) / max(len(tokens), 1),
+        "max": max(tokens, default=0),
+        "over": sum(1 for t in tokens if t > MODEL_MAX_TOKENS - 2),
+        "titled": sum(1 for c in chunks if c.metadata.get("section_title")),
+        "embed_s": seconds,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sections", type=int, default=60)
+    parser.add_argument("--pdf", nargs="*", default=[])
+    args = parser.parse_args()
+
+    from transformers import AutoTokenizer
+    from finrag.embedding_backends import load_embeddings
+
+    count_tokens = hf_token_counter(AutoTokenizer.from_pretrained(EMBEDDING_MODEL))
+    embeddings = load_embeddings("torch")[0]
+    embeddings.embed_documents(["warm-up"])
+
+    corpora = [("synthetic filing", make_filing(args.sections))] + [(p, load_pdf(p)) for p in args.pdf]
+    for name, pages in corpora:
+        recursive = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        structured = StructuredChunker(count_tokens, max_tokens=CHUNK_MAX_TOKENS, min_tokens=CHUNK_MIN_TOKENS)
+        rows = [
+            measure(f"recursive {CHUNK_SIZE}ch", recursive.split_documents(pages), count_tokens, embeddings),
+            measure(f"structured {CHUNK_MAX_TOKENS}tok", structured.split_documents(pages), count_tokens, embeddings),
+        ]
+
+        print(f"\n{name}: {len(pages)} pages")
+        print(f"{'chunker':<18}{'chunks':>7}{'mean tok':>9}{'max tok':>8}{'>limit':>7}{'titled':>7}{'embed s':>9}")
+        for r in rows:
+            print(
+                f"{r['label']:<18}{r['chunks']:>7}{r['mean']:>9.0f}{r['max']:>8}{r['over']:>7}"
+                f"{r['titled']:>7}{r['embed_s']:>9.2f}"
+            )
+        base, new = rows
+        print(
+            f"chunks: {1 - new['chunks'] / max(base['chunks'], 1):.0%} fewer | "
+            f"embedding time: {1 - new['embed_s'] / max(base['embed_s'], 1e-9):.0%} saved"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Embedding backends: PyTorch (sentence-transformers) vs ONNX Runtime fp32 / int8.
+
+Reports throughput in chunks/sec over synthetic CHUNK_SIZE-character chunks and a
+parity check: cosine similarity of each ONNX vector with the PyTorch vector for the
+same text. Exits non-zero if the mean falls below --min-cosine.
+
+    cd FinRAG && python benchmarks/bench_onnx_embeddings.py [--chunks 512] [--threads 4]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import CHUNK_SIZE  # noqa: E402
+
+WORDS = (
+    "revenue operating income EBITDA lease liabilities goodwill impairment cash flow "
+    "dividend capital expenditure net debt margin segment guidance currency interest "
+    "rate hedging provision deferred tax equity ratio quarter fiscal year note"
+).split()
+
+
+def make_chunks(count: int, seed: int = 11):
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(count):
+        words = []
+        while sum(len(w) + 1 for w in words) < CHUNK_SIZE:
+            words.append(rng.choice(WORDS))
+        chunks.append(f"Note {i}: " + " ".join(words))
+    return chunks
+
+
+def timed(embeddings, texts):
+    embeddings.embed_documents(texts[:8])  # warm-up (session init, kernel selection)
+    started = time.perf_counter()
+    vectors = np.array(embeddings.embed_documents(texts), dtype=np.float32)
+    return vectors, len(texts) / (time.perf_counter() - started)
+
+
+def cosine_rows(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return (a * b).sum(axis=1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=512)
+    parser.add_argument("--threads", type=int, default=0, help="ONNX Runtime intra-op threads (0 = default)")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    from finrag.embedding_backends import load_embeddings
+
+    texts = make_chunks(args.chunks)
+    reference, torch_rate = timed(load_embeddings("torch")[0], texts)
+    rows = [("torch", torch_rate, None)]
+    for quantize in (False, True):
+        vectors, rate = timed(load_embeddings("onnx", quantize=quantize, threads=args.threads)[0], texts)
+        rows.append(("onnx-int8" if quantize else "onnx-fp32", rate, cosine_rows(reference, vectors)))
+
+    print(f"\n{args.chunks} chunks of ~{CHUNK_SIZE} chars")
+    print(f"{'backend':<11}{'chunks/s':>10}{'speedup':>9}{'cos mean':>10}{'cos min':>9}")
+    failed = False
+    for label, rate, cos in rows:
+        parity = f"{cos.mean():>10.4f}{cos.min():>9.4f}" if cos is not None else f"{'-':>10}{'-':>9}"
+        print(f"{label:<11}{rate:>10.1f}{rate / torch_rate:>8.2f}x{parity}")
+        failed |= cos is not None and cos.mean() < args.min_cosine
+    if failed:
+        print(f"Parity check FAILED: mean cosine below {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+LLM precision modes on CPU: float32 vs bfloat16 vs int8 (dynamic Linear quantization).
+
+Each mode is loaded in its own subprocess (clean RSS), generates greedily on a fixed
+prompt set, and reports decode tokens/s and resident memory. Outputs are compared
+with float32 token by token as an accuracy sanity check: "agree" is the share of
+generated tokens before the first divergence, "exact" the share of identical answers.
+
+    cd FinRAG && python benchmarks/bench_precision.py [--modes float32,bfloat16,int8] [--max-new-tokens 48]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+PROMPTS = [
+    "What is the difference between EBITDA and operating income?",
+    "Explain what a debt-to-equity ratio of 2.5 means for a company.",
+    "A company reports revenue of 1,200 million and net income of 96 million. What is its net margin?",
+    "What are lease liabilities under IFRS 16?",
+    "Summarize the main risks of holding long-duration bonds when interest rates rise.",
+    "What does free cash flow measure?",
+]
+
+
+def run_mode(mode: str, max_new_tokens: int) -> dict:
+    """
+    Child process: load one precision mode and generate on PROMPTS.
+    """
+    import torch
+    from config import MODEL_NAME
+    from finsmart_common.model_registry import get_model_registry
+
+    started = time.perf_counter()
+    handle = get_model_registry().acquire(MODEL_NAME, device="cpu", precision=mode)
+    load_s = time.perf_counter() - started
+    tokenizer, model = handle.tokenizer, handle.model
+
+    outputs, rates = [], []
+    for prompt in PROMPTS:
+        inputs = tokenizer(prompt, return_tensors="pt")
+        started = time.perf_counter()
+        with torch.no_grad():
+            ids = model.generate(**inputs, max_new_tokens=max_new_tokens, do_sample=False)
+        elapsed = time.perf_counter() - started
+        generated = ids[0, inputs["input_ids"].shape[1]:].tolist()
+        outputs.append(generated)
+        rates.append(len(generated) / elapsed)
+
+    report = get_model_registry().memory_report()[0]
+    return {
+        "mode": mode,
+        "load_s": load_s,
+        "tokens_per_s": statistics.mean(rates),
+        "weights_mb": report["weights_mb"],
+        "rss_delta_mb": report["rss_delta_mb"],
+        "outputs": outputs,
+    }
+
+
+def agreement(reference, candidate) -> float:
+    matched = 0
+    for a, b in zip(reference, candidate):
+        if a != b:
+            break
+        matched += 1
+    return matched / max(len(reference), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modes", default="float32,bfloat16,int8")
+    parser.add_argument("--max-new-tokens", type=int, default=48)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_mode(args.child, args.max_new_tokens)))
+        return
+
+    modes = args.modes.split(",")
+    if "float32" not in modes:
+        modes.insert(0, "float32")  # reference for the accuracy check
+    results = {}
+    for mode in modes:
+        print(f"Running {mode}...")
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, "--max-new-tokens", str(args.max_new_tokens)],
+            capture_output=True, text=True, check=True
+        )
+        results[mode] = json.loads(out.stdout.strip().splitlines()[-1])
+
+    reference = results["float32"]["outputs"]
+    print(f"\n{len(PROMPTS)} prompts, {args.max_new_tokens} new tokens, greedy")
+    print(f"{'mode':<10}{'tok/s':>8}{'load s':>8}{'weights MB':>12}{'RSS MB':>9}{'agree':>8}{'exact':>8}")
+    for mode, r in results.items():
+        agree = statistics.mean(agreement(a, b) for a, b in zip(reference, r["outputs"]))
+        exact = sum(a == b for a, b in zip(reference, r["outputs"])) / len(reference)
+        rss = f"{r['rss_delta_mb']:.0f}" if r["rss_delta_mb"] is not None else "n/a"
+        print(
+            f"{mode:<10}{r['tokens_per_s']:>8.2f}{r['load_s']:>8.1f}{r['weights_mb']:>12.0f}"
+            f"{rss:>9}{agree:>8.0%}{exact:>8.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
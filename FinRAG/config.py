@@ -11,10 +11,122 @@ HF_TOKEN = os.getenv("HF_TOKEN")
 # Model Settings
 MODEL_NAME = "Shiva-k22/gemma-FinAI"
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# LLM precision: "float32", "float16", "bfloat16" or "int8" (dynamic Linear quantization, CPU)
+# Unset = registry default (float16 on CUDA, float32 elsewhere); shared with Fin_Personal_Assitant
+MODEL_PRECISION = os.getenv("MODEL_PRECISION") or None
+# Render answers token by token (TextIteratorStreamer) instead of after full generation
+STREAM_ANSWERS = os.getenv("STREAM_ANSWERS", "true").lower() == "true"
+# Keep the KV-cache of the fixed system-prompt prefix; each query prefills only its context + question
+PREFIX_KV_CACHE = os.getenv("PREFIX_KV_CACHE", "true").lower() == "true"
+
+# Embedding backend: "torch" (sentence-transformers) or "onnx" (ONNX Runtime, needs onnxruntime + onnx)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_EMBEDDING_QUANTIZE = os.getenv("ONNX_EMBEDDING_QUANTIZE", "true").lower() == "true"
+ONNX_EMBEDDING_THREADS = int(os.getenv("ONNX_EMBEDDING_THREADS", "0"))  # 0 = ONNX Runtime default
+ONNX_CACHE_DIR = os.getenv("ONNX_CACHE_DIR", ".cache/onnx")
+EMBEDDING_BATCH_SIZE = 64
+# Bulk ingestion: embed batches in a pool of worker processes, each with its own model
+# (0 workers = all cores). Off by default: every worker holds a copy of the model.
+EMBEDDING_POOL_ENABLED = os.getenv("EMBEDDING_POOL_ENABLED", "false").lower() == "true"
+EMBEDDING_POOL_WORKERS = int(os.getenv("EMBEDDING_POOL_WORKERS", "0"))
+
+# Embedding Cache (persistent, keyed by EMBEDDING_MODEL + sha256 of chunk text)
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
 
 # Ingestion Settings - Aggressive Optimization for Performance
 CHUNK_SIZE = 512
 CHUNK_OVERLAP = 50
+# "incremental": fingerprint chunks (sha256 of source + text) and write only the diff
+# "full": re-insert every chunk under session-scoped IDs (older sessions are reaped in the background)
+INGEST_MODE = os.getenv("INGEST_MODE", "incremental")
+# "structured": chunks sized in embedding-model tokens along headings, numbered notes
+# and table blocks, with section_title metadata (finrag/chunking.py)
+# "recursive": CHUNK_SIZE-character RecursiveCharacterTextSplitter
+CHUNKER = os.getenv("CHUNKER", "structured")
+# Structured chunker: body tokens per chunk (all-MiniLM-L6-v2 truncates at 256, leaving
+# room for the section heading); smaller sections merge with the next one
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "224"))
+CHUNK_MIN_TOKENS = 32
+# XLSX: rows per table-aware chunk (chunks are also capped at CHUNK_SIZE characters)
+XLSX_MAX_ROWS_PER_CHUNK = 50
+# Parallel PDF parsing: process count (0 = all cores); smaller PDFs are parsed serially
+PDF_EXTRACT_WORKERS = int(os.getenv("PDF_EXTRACT_WORKERS", "0"))
+PDF_PARALLEL_MIN_PAGES = int(os.getenv("PDF_PARALLEL_MIN_PAGES", "50"))
+# Chunks per embedding call / store write in the streaming pipeline
+INGEST_BATCH_SIZE = 64
+# Background ingestion jobs: concurrent jobs, queued jobs beyond that, and concurrent
+# embedding batches across all jobs (bounds model contention and peak memory; with the
+# embedding pool enabled, set it to at least EMBEDDING_POOL_WORKERS to keep every worker busy)
+INGEST_MAX_JOBS = int(os.getenv("INGEST_MAX_JOBS", "2"))
+INGEST_MAX_QUEUED = int(os.getenv("INGEST_MAX_QUEUED", "8"))
+INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "1"))
+
+# Session garbage collection: a background reaper deletes chunks of sessions idle for
+# longer than SESSION_TTL_S (or superseded by a newer upload), off the request path,
+# in batches of SESSION_REAP_BATCH_SIZE at most SESSION_REAP_MAX_DELETES_PER_S rows/s
+SESSION_TTL_S = float(os.getenv("SESSION_TTL_S", str(24 * 3600)))
+SESSION_REAP_INTERVAL_S = float(os.getenv("SESSION_REAP_INTERVAL_S", "60"))
+SESSION_REAP_BATCH_SIZE = 100
+SESSION_REAP_MAX_DELETES_PER_S = float(os.getenv("SESSION_REAP_MAX_DELETES_PER_S", "500"))
+
+# Retrieval
+# In-memory LRU of query embeddings (keyed by normalized query text)
+QUERY_EMBEDDING_CACHE_SIZE = 512
+# Concurrent vector searches for retrieve_many
+RETRIEVAL_MAX_WORKERS = 4
+# Hybrid retrieval: per-session BM25 index fused with vector results (reciprocal rank fusion)
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() == "true"
+HYBRID_RRF_K = 60
+# Vector candidates fetched per final result before fusion
+HYBRID_CANDIDATE_MULTIPLIER = 3
+# Lexical search must finish within this budget or retrieval falls back to dense-only
+HYBRID_LATENCY_BUDGET_MS = 50
+
+# Query rewriting: deterministic variants (acronyms, synonyms, number formats) searched
+# concurrently and merged by chunk ID. "off" | "fallback": only when the original query
+# returns nothing above the score threshold | "always"
+QUERY_REWRITE_MODE = os.getenv("QUERY_REWRITE_MODE", "fallback")
+QUERY_REWRITE_MAX_VARIANTS = 4
+# Variant searches still running after this are dropped
+QUERY_REWRITE_BUDGET_MS = int(os.getenv("QUERY_REWRITE_BUDGET_MS", "300"))
+
+# Prompt context: max tokens of retrieved context per prompt (LLM tokenizer)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1024"))
+# Rough CPU prefill cost, used only to log the time saved by trimming
+PREFILL_MS_PER_TOKEN_ESTIMATE = 5.0
+
+# Semantic answer cache per (user_id, session_id): a question whose embedding is this
+# similar (cosine) to an earlier one in the session, and mentions the same numbers and
+# years, is answered from cache
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.92"))
+ANSWER_CACHE_MAX_ENTRIES = 64
+
+# Precomputed document summaries (map-reduce after ingestion, off the request path):
+# requests for a summary of the whole document are answered from them once ready
+SUMMARY_ENABLED = os.getenv("SUMMARY_ENABLED", "false").lower() == "true"
+# Map step: characters of consecutive chunks per group, and at most this many groups,
+# sampled during ingestion (longer documents are covered by evenly spaced groups)
+SUMMARY_GROUP_CHARS = 3000
+SUMMARY_MAX_GROUPS = int(os.getenv("SUMMARY_MAX_GROUPS", "24"))
+# Reduce step: summaries combined per call, until one is left
+SUMMARY_REDUCE_FANIN = 6
+SUMMARY_MAP_MAX_NEW_TOKENS = 160
+SUMMARY_REDUCE_MAX_NEW_TOKENS = 384
 
 # Collection Name
 COLLECTION_NAME = "finrag_clean_v1"
+
+# Vector Store Backend
+# "astradb": remote AstraDB collection (default)
+# "local": in-process NumPy index, no network round trip (dev / load testing)
+# "astradb-local": in-process stand-in for the AstraDB collection API (tests / benchmarks)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "astradb")
+
+# AstraDB bulk writes: rows per insert_many, concurrent requests, retries per batch
+ASTRA_WRITE_BATCH_SIZE = int(os.getenv("ASTRA_WRITE_BATCH_SIZE", "50"))
+ASTRA_WRITE_CONCURRENCY = int(os.getenv("ASTRA_WRITE_CONCURRENCY", "4"))
+ASTRA_WRITE_MAX_RETRIES = int(os.getenv("ASTRA_WRITE_MAX_RETRIES", "3"))
+ASTRA_WRITE_BACKOFF_S = float(os.getenv("ASTRA_WRITE_BACKOFF_S", "0.5"))
@@ -0,0 +1,113 @@
+import re
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import streamlit as st
+
+from finrag.query_rewrite import normalize_numbers
+from config import ANSWER_CACHE_SIMILARITY, ANSWER_CACHE_MAX_ENTRIES
+
+_NUMBER_RE = re.compile(r"\d[\d,]*(?:\.\d+)?%?")
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    answer: str
+    chunk_ids: List[str]
+    similarity: float = 1.0
+    numbers: Tuple[str, ...] = ()
+
+
+class _SessionAnswers:
+    """
+    Answers of one session: unit-normalized question embeddings stacked in a matrix,
+    so a lookup is a single matrix-vector product.
+    """
+
+    def __init__(self):
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.entries: List[CachedAnswer] = []
+
+
+def question_numbers(question: str) -> Tuple[str, ...]:
+    """
+    Years, amounts and percentages of a question in one canonical form
+    ("FY24" -> "2024", "$1.2bn" -> "1200"), order-insensitive.
+    """
+    return tuple(sorted(n.replace(",", "") for n in _NUMBER_RE.findall(normalize_numbers(question))))
+
+
+def _unit(embedding: List[float]) -> np.ndarray:
+    vector = np.array(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class SemanticAnswerCache:
+    """
+    Per (user_id, session_id) answers, matched on query-embedding cosine similarity.
+    Embeddings barely separate "revenue in 2023" from "revenue in 2024", so a hit also
+    needs exactly the same numbers (years, amounts, percentages) as the cached question.
+    Entries are dropped when the session is re-ingested or superseded.
+    """
+
+    def __init__(self, threshold: float = ANSWER_CACHE_SIMILARITY, max_entries: int = ANSWER_CACHE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._sessions: Dict[Tuple[str, str], _SessionAnswers] = {}
+        self._lock = threading.Lock()
+
+    def lookup(self, user_id: str, session_id: str, embedding: List[float], question: str) -> Optional[CachedAnswer]:
+        numbers = question_numbers(question)
+        with self._lock:
+            session = self._sessions.get((user_id, session_id))
+            if session is None or not session.entries:
+                return None
+            scores = session.vectors @ _unit(embedding)
+            same_numbers = np.array([entry.numbers == numbers for entry in session.entries])
+            scores = np.where(same_numbers, scores, -np.inf)
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                return None
+            entry = session.entries[best]
+            return CachedAnswer(entry.question, entry.answer, entry.chunk_ids, float(scores[best]), entry.numbers)
+
+    def put(
+        self, user_id: str, session_id: str, embedding: List[float],
+        question: str, answer: str, chunk_ids: List[str]
+    ):
+        vector = _unit(embedding)[None, :]
+        with self._lock:
+            session = self._sessions.setdefault((user_id, session_id), _SessionAnswers())
+            if session.entries:
+                session.vectors = np.vstack([session.vectors, vector])
+            else:
+                session.vectors = vector
+            session.entries.append(CachedAnswer(question, answer, list(chunk_ids), numbers=question_numbers(question)))
+            # Oldest answers go first
+            if len(session.entries) > self.max_entries:
+                session.vectors = session.vectors[-self.max_entries:]
+                session.entries = session.entries[-self.max_entries:]
+
+    def drop_session(self, user_id: str, session_id: str):
+        with self._lock:
+            self._sessions.pop((user_id, session_id), None)
+
+    def drop_user(self, user_id: str, keep_session: Optional[str] = None):
+        """
+        Mirrors Step 12 cleanup: a new upload supersedes the user's older sessions.
+        """
+        with self._lock:
+            for key in [k for k in self._sessions if k[0] == user_id and k[1] != keep_session]:
+                del self._sessions[key]
+
+
+@st.cache_resource
+def get_answer_cache() -> SemanticAnswerCache:
+    """
+    Process-wide answer cache (Cached), invalidated by ingestion.
+    """
+    return SemanticAnswerCache()
@@ -1,54 +1,182 @@
 import os
-from typing import List, Dict, Optional, Any
+import uuid
+from typing import List, Dict, Optional, Any, Iterable
 from langchain_core.documents import Document
-from langchain_astradb import AstraDBVectorStore
 from finrag.model_factory import get_huggingface_embeddings
+from finrag.bulk_writer import BulkWriter
 from config import (
     ASTRA_DB_API_ENDPOINT,
     ASTRA_DB_APPLICATION_TOKEN,
-    COLLECTION_NAME
+    COLLECTION_NAME,
+    VECTOR_BACKEND
 )
 
+# AstraDB Data API rejects $in lists longer than this
+ASTRA_IN_LIMIT = 100
+
+
+def _id_batches(ids: Iterable[str], size: int = ASTRA_IN_LIMIT):
+    ids = list(ids)
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _get_path(row: Dict[str, Any], path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(row, dict):
+            return None
+        row = row.get(part)
+    return row
+
+
 class FinRAGVectorStore:
     def __init__(self):
         """
         Step 3: Embedding & Vector Storage interface.
+        Backend is selected by VECTOR_BACKEND ("astradb", "astradb-local" or "local").
         """
         self.embedding = get_huggingface_embeddings()
-        
-        # Initialize connection
-        # autodetect behavior: Use content_field explicit for empty DB support
-        self.vectorstore = AstraDBVectorStore(
-            embedding=self.embedding,
-            collection_name=COLLECTION_NAME,
-            api_endpoint=ASTRA_DB_API_ENDPOINT,
-            token=ASTRA_DB_APPLICATION_TOKEN,
-            autodetect_collection=False,
-            content_field="page_content"
-        )
+        self.backend = VECTOR_BACKEND
+
+        # Data API path (AstraDB or its local stand-in): rows are encoded with `codec`
+        # and written / searched / deleted through `collection` directly
+        self.collection = None
+        self.codec = None
+
+        if self.backend == "local":
+            from finrag.local_vectorstore import get_local_vectorstore
+            self.vectorstore = get_local_vectorstore(self.embedding)
+        elif self.backend == "astradb-local":
+            from finrag.local_collection import LocalDocumentCodec, get_local_collection
+            self.vectorstore = None
+            self.collection = get_local_collection()
+            self.codec = LocalDocumentCodec()
+        elif self.backend == "astradb":
+            from langchain_astradb import AstraDBVectorStore
+
+            # Initialize connection
+            # autodetect behavior: Use content_field explicit for empty DB support
+            self.vectorstore = AstraDBVectorStore(
+                embedding=self.embedding,
+                collection_name=COLLECTION_NAME,
+                api_endpoint=ASTRA_DB_API_ENDPOINT,
+                token=ASTRA_DB_APPLICATION_TOKEN,
+                autodetect_collection=False,
+                content_field="page_content"
+            )
+            self.collection = self.vectorstore.astra_env.collection
+            self.codec = self.vectorstore.document_codec
+        else:
+            raise ValueError(f"Unknown VECTOR_BACKEND: {self.backend}")
+
+        if self.collection is not None:
+            self.writer = BulkWriter(self.collection)
 
     def add_documents(self, documents: List[Document]):
         """
-        Stores chunks in AstraDB.
+        Stores chunks in the configured backend.
         """
-        self.vectorstore.add_documents(documents)
-        print(f"Stored {len(documents)} chunks in AstraDB.")
+        if self.backend == "local":
+            self.vectorstore.add_documents(documents)
+        else:
+            self.add_embedded_documents(documents, self.embed_documents(documents))
+        print(f"Stored {len(documents)} chunks in {self.backend}.")
 
-    def delete_user_data(self, user_id: str):
+    def embed_documents(self, documents: List[Document]) -> List[List[float]]:
         """
-        Step 12: Cleanup logic.
-        Deletes all documents for a specific user to prevent storage waste logic.
+        Embedding stage on its own, so ingestion can batch and report it separately.
         """
-        try:
-            print(f"Cleaning up old data for User: {user_id}...")
-            # Direct AstraPy fix to delete via metadata filter
-            self.vectorstore.astra_env.collection.delete_many(
-                filter={"user_id": user_id}
-            )
-            print(f"Cleanup complete for user: {user_id}")
-            
-        except Exception as e:
-            print(f"Cleanup Warning: {e} (Continuing ingestion)")
+        return self.embedding.embed_documents([d.page_content for d in documents])
+
+    def add_embedded_documents(
+        self, documents: List[Document], vectors: List[List[float]], ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Stores chunks whose vectors were already computed (no second embedding pass).
+        """
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in documents]
+        if self.backend == "local":
+            self.vectorstore.add_embeddings(documents, vectors, ids=ids)
+        else:
+            # Encode with the store's own codec so search/filters read the rows back unchanged;
+            # batched, concurrent insert_many with retries
+            self.writer.write([
+                self.codec.encode(content=d.page_content, document_id=i, vector=v, metadata=d.metadata)
+                for d, v, i in zip(documents, vectors, ids)
+            ])
+        return ids
+
+    def get_chunk_ids(self, filter: Dict[str, Any]) -> set:
+        """
+        IDs of stored chunks matching a metadata filter (no vectors or content fetched).
+        """
+        if self.backend == "local":
+            return set(self.vectorstore.get_ids(filter))
+        cursor = self.collection.find(
+            filter=self.codec.encode_filter(filter),
+            projection={"_id": True}
+        )
+        return {row["_id"] for row in cursor}
+
+    def get_chunk_metadata(self, filter: Dict[str, Any], keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Selected metadata fields of stored chunks matching a filter, keyed by chunk ID
+        (no vectors or content fetched). Missing fields read as None.
+        """
+        keys = list(keys)
+        if self.backend == "local":
+            return self.vectorstore.get_metadata(filter, keys)
+        # Same key -> stored path mapping the filters use, reused as the projection
+        paths = self.codec.encode_filter({key: True for key in keys})
+        cursor = self.collection.find(
+            filter=self.codec.encode_filter(filter),
+            projection={"_id": True, **paths}
+        )
+        return {row["_id"]: {key: _get_path(row, path) for key, path in zip(keys, paths)} for row in cursor}
+
+    def update_chunk_metadata(self, ids: Iterable[str], values: Dict[str, Any]):
+        """
+        Re-tags existing chunks in place (e.g. moves them to a new session) without re-embedding.
+        """
+        if self.backend == "local":
+            self.vectorstore.update_metadata(ids, values)
+            return
+        # Filter encoding maps metadata keys to their stored paths, which $set needs as well
+        update = {"$set": self.codec.encode_filter(values)}
+        for batch in _id_batches(ids):
+            self.collection.update_many(filter={"_id": {"$in": batch}}, update=update)
+
+    def update_chunks(self, updates: Dict[str, Dict[str, Any]]):
+        """
+        Sets per-chunk metadata (e.g. a new page or position) on existing chunks without re-embedding.
+        """
+        if self.backend == "local":
+            self.vectorstore.update_metadata_each(updates)
+            return
+        for doc_id, values in updates.items():
+            self.collection.update_one(filter={"_id": doc_id}, update={"$set": self.codec.encode_filter(values)})
+
+    def delete_chunks(self, ids: Iterable[str], filter: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Deletes chunks by ID; with `filter`, only those still matching it (e.g. a chunk
+        re-tagged to a newer session in the meantime is kept). Returns chunks deleted.
+        """
+        if self.backend == "local":
+            return self.vectorstore.delete_ids(ids, filter=filter)
+        guard = self.codec.encode_filter(filter) if filter else {}
+        deleted = 0
+        for batch in _id_batches(ids):
+            result = self.collection.delete_many(filter={"_id": {"$in": batch}, **guard})
+            deleted += max(result.deleted_count, 0)
+        return deleted
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embeds several queries in one forward pass.
+        Bypasses the persistent chunk cache: the retriever keeps its own in-memory LRU.
+        """
+        model = getattr(self.embedding, "base", self.embedding)
+        return model.embed_documents(list(queries))
 
     def similarity_search_with_score(
         self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None
@@ -56,4 +184,29 @@ class FinRAGVectorStore:
         """
         Step 5 & 6: Retrieval & Context Validation support.
         """
-        return self.vectorstore.similarity_search_with_score(query, k=k, filter=filter)
+        if self.backend == "local":
+            return self.vectorstore.similarity_search_with_score(query, k=k, filter=filter)
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k=k, filter=filter)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None
+    ) -> List[tuple[Document, float]]:
+        """
+        Same as similarity_search_with_score for an already embedded query.
+        """
+        if self.backend == "local":
+            return self.vectorstore.similarity_search_with_score_by_vector(embedding, k=k, filter=filter)
+        # Vector-sorted find on the collection; $similarity is on the same (1 + cos) / 2 scale
+        rows = self.collection.find(
+            filter=self.codec.encode_filter(filter or {}),
+            sort={"$vector": list(embedding)},
+            limit=k,
+            include_similarity=True
+        )
+        results = []
+        for row in rows:
+            doc = self.codec.decode(row)
+            if doc is not None:
+                doc.id = row["_id"]
+                results.append((doc, row["$similarity"]))
+        return results
@@ -0,0 +1,126 @@
+import csv
+import datetime
+import io
+from typing import Iterator, List, Optional, Sequence, Any
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+from finrag.pdf_extract import upload_buffer
+
+
+class BufferTextLoader(BaseLoader):
+    """
+    TextLoader equivalent that decodes the uploaded buffer directly (no temp file).
+    """
+
+    def __init__(self, file_obj, source: str, encoding: str = "utf-8"):
+        self.file_obj = file_obj
+        self.source = source
+        self.encoding = encoding
+
+    def lazy_load(self) -> Iterator[Document]:
+        # str(memoryview, ...) decodes without an intermediate bytes copy
+        text = str(upload_buffer(self.file_obj), self.encoding, errors="replace")
+        yield Document(page_content=text, metadata={"source": self.source})
+
+
+class BufferCSVLoader(BaseLoader):
+    """
+    CSVLoader equivalent streaming rows from the uploaded buffer.
+    One document per row as "column: value" lines, like langchain's CSVLoader.
+    """
+
+    def __init__(self, file_obj, source: str, encoding: str = "utf-8"):
+        self.file_obj = file_obj
+        self.source = source
+        self.encoding = encoding
+
+    def lazy_load(self) -> Iterator[Document]:
+        self.file_obj.seek(0)
+        stream = io.TextIOWrapper(self.file_obj, encoding=self.encoding, errors="replace", newline="")
+        try:
+            for i, row in enumerate(csv.DictReader(stream)):
+                content = "\n".join(
+                    f"{(k or '').strip()}: {v.strip() if isinstance(v, str) else ','.join(map(str.strip, v or []))}"
+                    for k, v in row.items()
+                )
+                yield Document(page_content=content, metadata={"source": self.source, "row": i})
+        finally:
+            # Detach so closing the wrapper does not close the caller's upload object
+            stream.detach()
+
+
+def _cell_text(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).replace("\n", " ").replace("|", "/").strip()
+
+
+def _table_row(values: Sequence[Any]) -> str:
+    return "| " + " | ".join(_cell_text(v) for v in values) + " |"
+
+
+class BufferXLSXLoader(BaseLoader):
+    """
+    Streams an .xlsx upload in openpyxl read-only mode (rows are parsed lazily,
+    the workbook is never fully materialized) and emits table-aware chunks:
+    each chunk is a markdown table of consecutive rows that repeats the sheet's
+    header row, sized by `max_chars` / `max_rows` instead of a character splitter.
+    Chunks are final: they carry sheet / row-range metadata for citations.
+    """
+
+    def __init__(self, file_obj, source: str, max_chars: int = 512, max_rows: int = 50):
+        self.file_obj = file_obj
+        self.source = source
+        self.max_chars = max_chars
+        self.max_rows = max_rows
+
+    def _chunk(self, sheet: str, header: str, rows: List[str], row_start: int, row_end: int) -> Document:
+        separator = "|" + " --- |" * (header.count("|") - 1)
+        return Document(
+            page_content="\n".join([f"Sheet: {sheet}", header, separator, *rows]),
+            metadata={
+                "source": self.source,
+                "sheet": sheet,
+                "row_start": row_start,
+                "row_end": row_end,
+                # Citation-friendly "page" for sheets: Sheet!first-last
+                "page": f"{sheet}!{row_start}-{row_end}"
+            }
+        )
+
+    def lazy_load(self) -> Iterator[Document]:
+        from openpyxl import load_workbook
+
+        self.file_obj.seek(0)
+        workbook = load_workbook(self.file_obj, read_only=True, data_only=True)
+        try:
+            for sheet in workbook.worksheets:
+                header: Optional[str] = None
+                rows: List[str] = []
+                size = 0
+                row_start = row_end = 0
+                for row_number, values in enumerate(sheet.iter_rows(values_only=True), start=1):
+                    if values is None or all(v is None or str(v).strip() == "" for v in values):
+                        continue
+                    line = _table_row(values)
+                    if header is None:
+                        # First non-empty row is treated as the header and repeated per chunk
+                        header = line
+                        continue
+                    if rows and (size + len(line) > self.max_chars or len(rows) >= self.max_rows):
+                        yield self._chunk(sheet.title, header, rows, row_start, row_end)
+                        rows, size = [], 0
+                    if not rows:
+                        row_start = row_number
+                    rows.append(line)
+                    size += len(line) + 1
+                    row_end = row_number
+                if rows:
+                    yield self._chunk(sheet.title, header, rows, row_start, row_end)
+        finally:
+            workbook.close()
@@ -0,0 +1,153 @@
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List
+
+from config import (
+    ASTRA_WRITE_BATCH_SIZE,
+    ASTRA_WRITE_CONCURRENCY,
+    ASTRA_WRITE_MAX_RETRIES,
+    ASTRA_WRITE_BACKOFF_S
+)
+
+
+# Data API error code for an insert whose _id is already stored
+DUPLICATE_ID_ERROR = "DOCUMENT_ALREADY_EXISTS"
+
+_executors: Dict[int, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(concurrency: int) -> ThreadPoolExecutor:
+    # Shared across writers (a FinRAGVectorStore is created per upload)
+    with _executors_lock:
+        if concurrency not in _executors:
+            _executors[concurrency] = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="finrag-write")
+        return _executors[concurrency]
+
+
+def is_duplicate_id_error(error: Exception) -> bool:
+    """
+    True for insert failures caused by existing _ids: astrapy's error descriptors
+    (also those of the per-request exceptions of an insert_many), or the error text.
+    """
+    for descriptor in getattr(error, "error_descriptors", None) or []:
+        if getattr(descriptor, "error_code", None) == DUPLICATE_ID_ERROR:
+            return True
+    if any(is_duplicate_id_error(inner) for inner in getattr(error, "exceptions", None) or []):
+        return True
+    return DUPLICATE_ID_ERROR in str(error)
+
+
+@dataclass
+class WriteReport:
+    rows: int = 0
+    batches: int = 0
+    retries: int = 0
+    upserted: int = 0
+    seconds: float = 0.0
+    batch_ms: List[float] = field(default_factory=list)
+
+    @property
+    def rows_per_s(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        if not self.batch_ms:
+            return "Bulk write: nothing to write."
+        p95 = statistics.quantiles(self.batch_ms, n=20)[-1] if len(self.batch_ms) > 1 else self.batch_ms[0]
+        return (
+            f"Bulk write: {self.rows} rows in {self.batches} batches, {self.seconds:.2f}s "
+            f"({self.rows_per_s:.0f} rows/s) | batch ms p50 {statistics.median(self.batch_ms):.0f} "
+            f"p95 {p95:.0f} | retries {self.retries} | upserted {self.upserted}"
+        )
+
+
+class BulkWriter:
+    """
+    Writes encoded rows to a Data API collection (AstraDB or the local stand-in) in
+    fixed-size insert_many batches on a bounded pool of concurrent workers.
+
+    A failed batch is retried with exponential backoff (plus jitter); on a partial
+    failure only the rows missing from the error's `inserted_ids` are sent again.
+
+    Rows whose _id already exists (DOCUMENT_ALREADY_EXISTS: a retried insert that had
+    landed, or an overlapping upload of the same file) are written again with
+    replace_one(upsert=True) straight away, no backoff: IDs are content fingerprints,
+    and the new metadata (session tags, page) wins, as with the local backend's upsert.
+    """
+
+    def __init__(
+        self,
+        collection,
+        batch_size: int = ASTRA_WRITE_BATCH_SIZE,
+        concurrency: int = ASTRA_WRITE_CONCURRENCY,
+        max_retries: int = ASTRA_WRITE_MAX_RETRIES,
+        backoff_s: float = ASTRA_WRITE_BACKOFF_S,
+    ):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self._executor = _get_executor(concurrency)
+        self._lock = threading.Lock()
+
+    def _insert_batch(self, rows: List[Dict[str, Any]], report: WriteReport):
+        started = time.perf_counter()
+        pending = rows
+        replace = False
+        attempt = 0
+        while True:
+            try:
+                if replace:
+                    # One row at a time, so a failure resumes after the rows already replaced
+                    while pending:
+                        self.collection.replace_one({"_id": pending[0]["_id"]}, pending[0], upsert=True)
+                        pending = pending[1:]
+                        with self._lock:
+                            report.upserted += 1
+                else:
+                    self.collection.insert_many(pending, ordered=False)
+                break
+            except Exception as e:
+                if not replace:
+                    inserted = set(getattr(e, "inserted_ids", None) or [])
+                    pending = [row for row in pending if row["_id"] not in inserted]
+                    if is_duplicate_id_error(e):
+                        replace = True
+                        continue
+                if attempt == self.max_retries:
+                    raise
+                with self._lock:
+                    report.retries += 1
+                delay = self.backoff_s * (2 ** attempt) * (1 + random.random())
+                print(f"Bulk write: {len(pending)} rows failed ({e}), retry {attempt + 1} in {delay:.2f}s")
+                time.sleep(delay)
+                attempt += 1
+
+        with self._lock:
+            report.batches += 1
+            report.rows += len(rows)
+            report.batch_ms.append((time.perf_counter() - started) * 1000)
+
+    def write(self, rows: List[Dict[str, Any]]) -> WriteReport:
+        """
+        Inserts all rows; returns per-batch timings. Raises the last error of any batch
+        that still fails after max_retries (other batches are still written).
+        """
+        report = WriteReport()
+        started = time.perf_counter()
+        futures = [
+            self._executor.submit(self._insert_batch, rows[i:i + self.batch_size], report)
+            for i in range(0, len(rows), self.batch_size)
+        ]
+        errors = [f.exception() for f in futures]
+        report.seconds = time.perf_counter() - started
+        print(report.summary())
+        failed = [e for e in errors if e is not None]
+        if failed:
+            raise failed[-1]
+        return report
@@ -0,0 +1,223 @@
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional
+
+from langchain_core.documents import Document
+
+# Token counts for a batch of texts (embedding-model tokenizer, no special tokens)
+TokenCounter = Callable[[List[str]], List[int]]
+
+HEADING, TABLE, TEXT = "heading", "table", "text"
+
+# "Note 14 Leases", "Item 7. Management's Discussion", "3.2 Revenue", "IV. Risk Factors"
+_NUMBERED_HEADING_RE = re.compile(
+    r"^(?:(?:note|item|section|part|schedule)\s+\d+[a-z]?\b|\d{1,2}(?:\.\d{1,2})*\.?\s+[A-Z]|[IVX]{1,5}\.\s+[A-Z])",
+    re.IGNORECASE
+)
+# 1,234 | (567) | -12.5% | $3.4 | 2024
+_NUMBER_RE = re.compile(r"^\(?[-+]?[$€£]?\d[\d,]*(?:\.\d+)?%?\)?$")
+_COLUMN_GAP_RE = re.compile(r"\S(?:\t| {2,})\S")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+
+
+def hf_token_counter(tokenizer) -> TokenCounter:
+    """
+    Batched token counter over a Hugging Face (fast) tokenizer.
+    """
+    def count(texts: List[str]) -> List[int]:
+        if not texts:
+            return []
+        encoded = tokenizer(
+            texts, add_special_tokens=False, return_attention_mask=False, return_token_type_ids=False
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+    return count
+
+
+def is_table_row(line: str) -> bool:
+    """
+    Column-aligned or number-heavy line, as PDF text extraction renders table rows.
+    """
+    if line.count("|") >= 2 or len(_COLUMN_GAP_RE.findall(line)) >= 2:
+        return True
+    cells = line.split()
+    numbers = sum(1 for cell in cells if _NUMBER_RE.match(cell))
+    return numbers >= 2 and numbers / len(cells) >= 0.25 and not line.endswith(".")
+
+
+def is_heading(line: str) -> bool:
+    if len(line) > 100 or len(line.split()) > 12 or line[-1] in ".,;":
+        return False
+    if line.startswith("#") or _NUMBERED_HEADING_RE.match(line):
+        return True
+    letters = [c for c in line if c.isalpha()]
+    return len(letters) >= 4 and line.upper() == line
+
+
+@dataclass
+class Block:
+    kind: str
+    text: str
+    tokens: int = 0
+
+
+def split_blocks(text: str) -> List[Block]:
+    """
+    Page text -> headings, table blocks (consecutive table rows) and paragraphs
+    (consecutive prose lines up to a blank line).
+    """
+    blocks: List[Block] = []
+    run: List[str] = []
+    run_kind: Optional[str] = None
+
+    def close():
+        nonlocal run, run_kind
+        if run:
+            blocks.append(Block(run_kind, "\n".join(run)))
+        run, run_kind = [], None
+
+    for raw in text.splitlines():
+        line = raw.strip()
+        if not line:
+            close()
+            continue
+        kind = TABLE if is_table_row(line) else HEADING if is_heading(line) else TEXT
+        if kind == HEADING:
+            close()
+            blocks.append(Block(HEADING, line.lstrip("# ").strip()))
+            continue
+        if kind != run_kind:
+            close()
+            run_kind = kind
+        run.append(line)
+    close()
+    return blocks
+
+
+class StructuredChunker:
+    """
+    Structure-aware chunker measuring length in embedding-model tokens.
+
+    Page text is split into headings, table blocks and paragraphs; blocks are packed
+    into chunks of at most `max_tokens` (plus the heading line that opens a section)
+    without cutting through a table row or a sentence. A heading (including numbered
+    notes) closes the current chunk once it holds `min_tokens` of body text, and
+    becomes the `section_title` of the chunks that follow, across page boundaries.
+    Headings left at the end of a page with no body after them (a cover page, a
+    title-only slide) are kept as a chunk of their own. Oversized tables are split
+    by rows with the header row repeated; oversized paragraphs by sentences.
+
+    Token counts for a page are computed in one batched tokenizer call. Drop-in for
+    the text splitter in ingest_file (split_documents); one instance per document.
+    """
+
+    def __init__(self, count_tokens: TokenCounter, max_tokens: int = 224, min_tokens: int = 32):
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.section_title: Optional[str] = None
+
+    def _fit(self, blocks: List[Block]) -> List[Block]:
+        """
+        Replaces blocks longer than max_tokens by pieces that fit.
+        """
+        out: List[Block] = []
+        for block in blocks:
+            if block.tokens <= self.max_tokens or block.kind == HEADING:
+                out.append(block)
+                continue
+            if block.kind == TABLE:
+                header, *rows = block.text.split("\n")
+                header_tokens, *row_tokens = self.count_tokens([header] + rows)
+                out.extend(self._pack_rows(header, header_tokens, rows, row_tokens))
+            else:
+                sentences = _SENTENCE_RE.split(block.text)
+                for sentence, tokens in zip(sentences, self.count_tokens(sentences)):
+                    out.extend(self._window(sentence, tokens))
+        return out
+
+    def _pack_rows(self, header: str, header_tokens: int, rows: List[str], row_tokens: List[int]) -> List[Block]:
+        # Consecutive rows under one repeated header row (as in BufferXLSXLoader)
+        pieces, current, size = [], [], header_tokens
+        for row, tokens in zip(rows, row_tokens):
+            if current and size + tokens > self.max_tokens:
+                pieces.append(Block(TABLE, "\n".join([header] + current), size))
+                current, size = [], header_tokens
+            current.append(row)
+            size += tokens
+        if current or not pieces:
+            pieces.append(Block(TABLE, "\n".join([header] + current), size))
+        return pieces
+
+    def _window(self, text: str, tokens: int) -> List[Block]:
+        # A single sentence over budget (rare): split by words, proportionally to tokens
+        if tokens <= self.max_tokens:
+            return [Block(TEXT, text, tokens)]
+        words = text.split()
+        per_window = max(1, int(len(words) * self.max_tokens / tokens))
+        return [
+            Block(TEXT, " ".join(words[i:i + per_window]), min(tokens, self.max_tokens))
+            for i in range(0, len(words), per_window)
+        ]
+
+    def split_text(self, text: str) -> List[Dict]:
+        """
+        Returns [{"text": ..., "section_title": ..., "tokens": ...}] for one page.
+        """
+        blocks = split_blocks(text)
+        for block, tokens in zip(blocks, self.count_tokens([b.text for b in blocks])):
+            block.tokens = tokens
+        blocks = self._fit(blocks)
+
+        chunks: List[Dict] = []
+        parts: List[str] = []
+        titles: List[str] = []
+        size = body = 0
+
+        def flush(final: bool = False):
+            nonlocal parts, titles, size, body
+            # Mid-page, heading-only text waits for its body; at the end of the page it is kept
+            if body or (final and parts):
+                chunks.append({
+                    "text": "\n".join(parts),
+                    "section_title": "; ".join(titles) or self.section_title,
+                    "tokens": size,
+                })
+                parts, titles, size, body = [], [], 0, 0
+
+        for block in blocks:
+            if block.kind == HEADING:
+                if body >= self.min_tokens:
+                    flush()
+                if not body:
+                    # Nested headings with nothing in between: the innermost one names the section
+                    titles = [block.text]
+                else:
+                    # Small section merged with the next one: the chunk cites both
+                    if not titles and self.section_title:
+                        titles = [self.section_title]
+                    titles.append(block.text)
+                self.section_title = block.text
+                parts.append(block.text)
+                size += block.tokens
+                continue
+            if body and size + block.tokens > self.max_tokens:
+                flush()
+            parts.append(block.text)
+            size += block.tokens
+            body += block.tokens
+        flush(final=True)
+        return chunks
+
+    def split_documents(self, documents: Iterable[Document]) -> List[Document]:
+        return [
+            Document(
+                page_content=chunk["text"],
+                metadata={
+                    **doc.metadata,
+                    **({"section_title": chunk["section_title"]} if chunk["section_title"] else {}),
+                },
+            )
+            for doc in documents
+            for chunk in self.split_text(doc.page_content)
+        ]
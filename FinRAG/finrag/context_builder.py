@@ -0,0 +1,122 @@
+from typing import List, Dict, Tuple, Any
+
+from langchain_core.documents import Document
+
+# Partial chunks shorter than this are dropped instead of truncated (too little to cite)
+MIN_PARTIAL_TOKENS = 32
+
+
+def _score(doc: Document) -> float:
+    # Fused rank when hybrid retrieval ran, else the vector relevance score
+    meta = doc.metadata
+    return meta.get("fusion_score", meta.get("relevance_score", 0.0)) or 0.0
+
+
+def _overlap(previous: str, text: str, max_overlap: int) -> int:
+    """
+    Length of the longest suffix of `previous` that is also a prefix of `text`.
+    """
+    for n in range(min(len(previous), len(text), max_overlap), 0, -1):
+        if previous.endswith(text[:n]):
+            return n
+    return 0
+
+
+def _format(doc: Document, text: str) -> str:
+    meta = doc.metadata
+    source_str = f"[Doc: {meta.get('source', 'Unknown')} | Page: {meta.get('page', 'N/A')}"
+    if meta.get("section_title"):
+        source_str += f" | Section: {meta['section_title']}"
+    source_str += "]"
+    return f"{source_str}\n{text}\n\n"
+
+
+def _fit(token_ids: List[List[int]], max_tokens: int) -> Tuple[int, int]:
+    """
+    Greedy budget over blocks in order: (blocks kept in full, tokens of a partial last
+    block or 0 when too little of it would fit).
+    """
+    used = 0
+    for i, ids in enumerate(token_ids):
+        remaining = max_tokens - used
+        if len(ids) > remaining:
+            return i, remaining if remaining >= MIN_PARTIAL_TOKENS else 0
+        used += len(ids)
+    return len(token_ids), 0
+
+
+def build_context(
+    docs: List[Document], tokenizer, max_tokens: int, max_overlap: int = 100
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Step 7: Prompt Context Injection under a token budget.
+
+    1. Orders chunks by score (best first) and drops exact duplicate chunks.
+    2. Counts tokens with the LLM tokenizer (one batched call) and keeps chunks until
+       `max_tokens`; the last one is truncated if a meaningful part still fits.
+    3. Removes text duplicated by CHUNK_OVERLAP between neighbouring chunks of the
+       same source, only against a neighbour that is in the context in full (a
+       dropped or truncated one would take the shared text with it).
+
+    Budget inclusion is decided on the untrimmed chunks, so trimming only frees room.
+    Returns (context_text, stats).
+    """
+    ordered = sorted(docs, key=_score, reverse=True)
+
+    kept_docs: List[Document] = []
+    seen_texts = set()
+    dedup_chars = 0
+    for doc in ordered:
+        if doc.page_content in seen_texts:
+            dedup_chars += len(doc.page_content)
+            continue
+        seen_texts.add(doc.page_content)
+        kept_docs.append(doc)
+
+    blocks = [_format(doc, doc.page_content) for doc in kept_docs]
+    token_ids = tokenizer(blocks, add_special_tokens=False)["input_ids"] if blocks else []
+    total_tokens = sum(len(ids) for ids in token_ids)
+    full, partial = _fit(token_ids, max_tokens)
+    selected = kept_docs[:full + (1 if partial else 0)]
+
+    # The splitter repeats the tail of chunk i at the start of chunk i+1
+    in_full = {
+        (d.metadata.get("source"), d.metadata.get("chunk_id")): d.page_content for d in kept_docs[:full]
+    }
+    blocks = []
+    for doc in selected:
+        text = doc.page_content
+        chunk_id = doc.metadata.get("chunk_id")
+        if isinstance(chunk_id, int):
+            previous = in_full.get((doc.metadata.get("source"), chunk_id - 1))
+            if previous:
+                n = _overlap(previous, text, max_overlap)
+                text = text[n:].lstrip()
+                dedup_chars += n
+        blocks.append(_format(doc, text))
+
+    # Trimming only shortens blocks, so the full ones still fit; the budget is re-checked anyway
+    token_ids = tokenizer(blocks, add_special_tokens=False)["input_ids"] if blocks else []
+    parts: List[str] = []
+    used = 0
+    for block, ids in zip(blocks, token_ids):
+        remaining = max_tokens - used
+        if len(ids) <= remaining:
+            parts.append(block)
+            used += len(ids)
+        elif remaining >= MIN_PARTIAL_TOKENS:
+            parts.append(tokenizer.decode(ids[:remaining], skip_special_tokens=True) + "\n\n")
+            used += remaining
+            break
+        else:
+            break
+
+    stats = {
+        "chunks_in": len(docs),
+        "chunks_used": len(parts),
+        "tokens_in": total_tokens,
+        "tokens_used": used,
+        "tokens_trimmed": total_tokens - used,
+        "dedup_chars": dedup_chars,
+    }
+    return "".join(parts), stats
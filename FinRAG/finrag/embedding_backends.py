@@ -0,0 +1,33 @@
+# Embedding model construction.
+# Kept free of streamlit imports: embedding pool worker processes import this module only.
+from config import (
+    EMBEDDING_MODEL,
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    ONNX_EMBEDDING_QUANTIZE,
+    ONNX_EMBEDDING_THREADS,
+    ONNX_CACHE_DIR
+)
+
+
+def load_embeddings(
+    backend: str = EMBEDDING_BACKEND, quantize: bool = ONNX_EMBEDDING_QUANTIZE, threads: int = ONNX_EMBEDDING_THREADS
+):
+    """
+    Builds the uncached embedding model for `backend`.
+    Returns (embeddings, variant); `variant` keys the embedding cache, since the
+    ONNX / int8 vectors are close to but not identical with the PyTorch ones.
+    """
+    if backend == "onnx":
+        from finrag.onnx_embeddings import OnnxEmbeddings
+        embeddings = OnnxEmbeddings(
+            EMBEDDING_MODEL, ONNX_CACHE_DIR, quantize=quantize,
+            threads=threads, batch_size=EMBEDDING_BATCH_SIZE
+        )
+        return embeddings, f"{EMBEDDING_MODEL}#onnx{'-int8' if quantize else ''}"
+
+    from langchain_huggingface import HuggingFaceEmbeddings  # heavy: imported on first use
+    embeddings = HuggingFaceEmbeddings(
+        model_name=EMBEDDING_MODEL, encode_kwargs={"batch_size": EMBEDDING_BATCH_SIZE}
+    )
+    return embeddings, EMBEDDING_MODEL
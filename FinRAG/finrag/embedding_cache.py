@@ -0,0 +1,154 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import List, Dict, Iterable, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# SQLite caps bound parameters per statement; stay well below the limit
+_SQL_BATCH = 500
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Persistent (model, sha256(text)) -> float32 vector store in SQLite.
+    Bounded by entry count; least-recently-used rows are evicted first.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, hash)
+            ) WITHOUT ROWID
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+        self._conn.commit()
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        """
+        Returns cached vectors for the hashes that are present and bumps their access time.
+        """
+        hashes = list(hashes)
+        found: Dict[str, List[float]] = {}
+        now = time.time()
+        with self._lock:
+            for start in range(0, len(hashes), _SQL_BATCH):
+                batch = hashes[start:start + _SQL_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *batch]
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32).tolist()
+                if rows:
+                    self._conn.execute(
+                        f"UPDATE embeddings SET last_access = ? WHERE model = ? AND hash IN ({placeholders})",
+                        [now, model, *batch]
+                    )
+            self._conn.commit()
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]):
+        now = time.time()
+        rows = [(model, h, np.asarray(v, dtype=np.float32).tobytes(), now) for h, v in vectors.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                """
+                DELETE FROM embeddings WHERE (model, hash) IN (
+                    SELECT model, hash FROM embeddings ORDER BY last_access LIMIT ?
+                )
+                """,
+                (overflow,)
+            )
+            print(f"Embedding cache: evicted {overflow} least-recently-used entries.")
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only sends cache misses to the underlying model.
+    Queries are passed through (they are short and rarely repeat verbatim).
+    """
+
+    def __init__(self, base: Embeddings, cache: EmbeddingCache, model_name: str):
+        self.base = base
+        self.cache = cache
+        self.model_name = model_name
+
+    def lookup(self, texts: List[str]) -> Tuple[List[str], Dict[str, List[float]], Dict[str, str]]:
+        """
+        Cache side of embed_documents, for callers that embed the misses elsewhere
+        (e.g. the embedding process pool): (hashes, cached vectors, misses by hash).
+        """
+        hashes = [content_hash(t) for t in texts]
+        cached = self.cache.get_many(self.model_name, set(hashes))
+
+        # Deduplicate misses so repeated boilerplate in one batch is embedded once
+        missing: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in cached and h not in missing:
+                missing[h] = t
+        return hashes, cached, missing
+
+    def complete(
+        self, hashes: List[str], cached: Dict[str, List[float]], missing: Dict[str, str], vectors: List[List[float]]
+    ) -> List[List[float]]:
+        """
+        Stores the vectors computed for `missing` and returns all vectors in input order.
+        """
+        # Counted before the merge: repeats of a miss within the batch are not cache hits
+        hits = sum(1 for h in hashes if h in cached)
+        if missing:
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model_name, fresh)
+            cached.update(fresh)
+
+        repeats = len(hashes) - hits - len(missing)
+        print(
+            f"Embedding cache: {hits} hits, {len(missing)} embedded"
+            + (f", {repeats} repeated in batch." if repeats else ".")
+        )
+        return [cached[h] for h in hashes]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes, cached, missing = self.lookup(texts)
+        vectors = self.base.embed_documents(list(missing.values())) if missing else []
+        return self.complete(hashes, cached, missing, vectors)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.base.embed_query(text)
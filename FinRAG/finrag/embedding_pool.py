@@ -0,0 +1,124 @@
+# Multi-process bulk embedding.
+# Kept free of streamlit imports: worker processes import this module only.
+import atexit
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+# Per-worker embedding model, built once by the pool initializer
+_worker_embeddings: Optional[Embeddings] = None
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def _init_worker(threads: int):
+    """
+    Loads the embedding model once per worker process. Each worker gets an equal
+    share of the cores so workers do not oversubscribe each other's intra-op pools.
+    """
+    global _worker_embeddings
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass  # ONNX backend without torch installed
+
+    from finrag.embedding_backends import load_embeddings
+    _worker_embeddings, _ = load_embeddings(threads=threads)
+
+
+def _embed_texts(texts: List[str]) -> List[List[float]]:
+    return _worker_embeddings.embed_documents(texts)
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    One pool per process, reused across uploads: the workers' models stay loaded
+    ("spawn" avoids forking a process that already holds model threads).
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(threads,),
+            )
+            _pool_workers = workers
+            print(f"Embedding pool: {workers} worker processes x {threads} threads")
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+def embed_stream(
+    embedding: Embeddings,
+    batches: Iterable[Tuple[Any, List[str]]],
+    workers: int = 0,
+    slots: Optional[threading.Semaphore] = None,
+) -> Iterator[Tuple[Any, List[List[float]]]]:
+    """
+    Embeds (payload, texts) batches across the worker pool and yields
+    (payload, vectors) in input order, as soon as each batch (and all before it) is done.
+
+    At most 2 x workers batches are in flight, so memory stays bounded and the caller
+    can store finished batches while later ones are still being embedded. When
+    `embedding` is a CachedEmbeddings, cache lookups and writes happen here in the
+    parent and only misses are sent to the workers.
+
+    `slots`, when given, is held by each batch while the pool embeds it (released as
+    soon as it is done, not while the caller stores it), bounding pool work across callers.
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = _get_pool(workers)
+    cached_embedding = embedding if hasattr(embedding, "lookup") else None
+
+    in_flight: deque = deque()
+
+    def _finish():
+        payload, lookup, future = in_flight.popleft()
+        vectors = future.result() if future is not None else []
+        if lookup is not None:
+            vectors = cached_embedding.complete(*lookup, vectors)
+        return payload, vectors
+
+    for payload, texts in batches:
+        if cached_embedding is not None:
+            hashes, cached, missing = cached_embedding.lookup(texts)
+            todo = list(missing.values())
+            lookup = (hashes, cached, missing)
+        else:
+            todo, lookup = texts, None
+        future: Optional[Future] = None
+        if todo:
+            if slots is None:
+                future = pool.submit(_embed_texts, todo)
+            else:
+                slots.acquire()
+                try:
+                    future = pool.submit(_embed_texts, todo)
+                except BaseException:
+                    slots.release()
+                    raise
+                future.add_done_callback(lambda _: slots.release())
+        in_flight.append((payload, lookup, future))
+
+        if len(in_flight) >= 2 * workers:
+            yield _finish()
+    while in_flight:
+        yield _finish()
@@ -0,0 +1,136 @@
+import io
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import streamlit as st
+
+from finrag.ingest_service import ingest_file, IngestCancelled, STAGES
+from finrag.session_reaper import get_session_reaper
+from config import INGEST_MAX_JOBS, INGEST_MAX_QUEUED
+
+# Job states; the last three are final
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINAL_STATES = (DONE, FAILED, CANCELLED)
+
+
+@dataclass
+class IngestJob:
+    job_id: str
+    filename: str
+    user_id: str
+    session_id: str
+    status: str = QUEUED
+    progress: Dict[str, int] = field(default_factory=lambda: {**{s: 0 for s in STAGES}, "unchanged": 0})
+    chunks: int = 0
+    error: Optional[str] = None
+    submitted_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATES
+
+
+class IngestJobManager:
+    """
+    Runs ingest_file on a bounded worker pool so uploads never block a Streamlit session.
+
+    submit() returns a job ID immediately; the UI polls get() for status and per-stage
+    progress. At most INGEST_MAX_JOBS run at once and INGEST_MAX_QUEUED wait, so peak
+    memory under concurrent uploads is bounded (embedding is further limited inside
+    ingest_file). A new upload supersedes the user's unfinished ones: they are
+    cancelled, and the session reaper keeps the newest submission.
+    """
+
+    def __init__(self, max_workers: int = INGEST_MAX_JOBS, max_queued: int = INGEST_MAX_QUEUED):
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="finrag-ingest")
+        self._jobs: Dict[str, IngestJob] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, file_obj, filename: str, user_id: str, session_id: str) -> str:
+        self.prune()
+        with self._lock:
+            pending = sum(1 for job in self._jobs.values() if job.status == QUEUED)
+            if pending >= self.max_queued:
+                raise RuntimeError(f"Ingestion queue is full ({pending} jobs waiting). Try again shortly.")
+            job = IngestJob(job_id=str(uuid.uuid4()), filename=filename, user_id=user_id, session_id=session_id)
+            superseded = [j for j in self._jobs.values() if j.user_id == user_id and not j.done]
+            self._jobs[job.job_id] = job
+        get_session_reaper().register(user_id, session_id)
+        for older in superseded:
+            older.cancel_event.set()
+            print(f"Ingestion job {older.job_id} cancelled: superseded by a new upload")
+
+        # Own copy of the bytes: the Streamlit UploadedFile belongs to the session's reruns
+        buffer = io.BytesIO(bytes(file_obj.getbuffer()))
+        self._executor.submit(self._run, job, buffer)
+        print(f"Ingestion job {job.job_id} queued for {filename}")
+        return job.job_id
+
+    def _run(self, job: IngestJob, buffer: io.BytesIO):
+        if job.cancel_event.is_set():
+            self._finish(job, CANCELLED)
+            return
+        job.status = RUNNING
+
+        def on_progress(progress: Dict[str, int]):
+            job.progress = dict(progress)
+
+        try:
+            job.chunks = ingest_file(
+                buffer, job.filename, job.user_id, job.session_id,
+                progress_callback=on_progress,
+                should_cancel=job.cancel_event.is_set
+            )
+            self._finish(job, DONE)
+        except IngestCancelled:
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, FAILED)
+            print(f"Ingestion job {job.job_id} failed: {e}")
+
+    def _finish(self, job: IngestJob, status: str):
+        job.status = status
+        job.finished_at = time.time()
+
+    def get(self, job_id: str) -> Optional[IngestJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs_for(self, user_id: str) -> List[IngestJob]:
+        with self._lock:
+            return [job for job in self._jobs.values() if job.user_id == user_id]
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Requests cancellation; a running job stops at its next batch boundary.
+        """
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_event.set()
+        return True
+
+    def prune(self, max_age_s: float = 3600):
+        """
+        Forgets finished jobs older than `max_age_s`.
+        """
+        cutoff = time.time() - max_age_s
+        with self._lock:
+            for job_id in [j for j, job in self._jobs.items() if job.done and job.finished_at < cutoff]:
+                del self._jobs[job_id]
+
+
+@st.cache_resource
+def get_ingest_jobs() -> IngestJobManager:
+    """
+    Process-wide ingestion job manager (Cached), shared by all sessions.
+    """
+    return IngestJobManager()
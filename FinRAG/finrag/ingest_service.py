@@ -1,74 +1,296 @@
-import os
 import datetime
+import hashlib
+import threading
 import uuid
-from typing import List, Optional
+from typing import List, Optional, Iterable, Iterator, Callable, Dict, Tuple
 
-from langchain_community.document_loaders import PyPDFLoader, TextLoader, CSVLoader
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 from finrag.astradb_vectorstore import FinRAGVectorStore
-from config import CHUNK_SIZE, CHUNK_OVERLAP
+from finrag.chunking import StructuredChunker, hf_token_counter
+from finrag.model_factory import get_embedding_tokenizer
+from finrag.pdf_extract import ParallelPDFLoader
+from finrag.buffer_loaders import BufferTextLoader, BufferCSVLoader, BufferXLSXLoader
+from finrag.lexical_index import get_lexical_registry
+from finrag.answer_cache import get_answer_cache
+from finrag.embedding_pool import embed_stream
+from finrag.session_reaper import get_session_reaper
+from finrag.summarizer import ChunkGroups, get_summarizer
+from config import (
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    CHUNKER,
+    CHUNK_MAX_TOKENS,
+    CHUNK_MIN_TOKENS,
+    INGEST_BATCH_SIZE,
+    INGEST_MODE,
+    HYBRID_RETRIEVAL,
+    PDF_EXTRACT_WORKERS,
+    PDF_PARALLEL_MIN_PAGES,
+    XLSX_MAX_ROWS_PER_CHUNK,
+    INGEST_EMBED_CONCURRENCY,
+    EMBEDDING_POOL_ENABLED,
+    EMBEDDING_POOL_WORKERS,
+    SUMMARY_ENABLED,
+    SUMMARY_GROUP_CHARS,
+    SUMMARY_MAX_GROUPS
+)
 
-def ingest_file(file_obj, filename: str, user_id: str, session_id: str) -> int:
+# Pipeline stages reported to the UI, in order
+STAGES = ("parse", "chunk", "embed", "store")
+
+# Chunk metadata that depends on where the text sits in the document, not on the text itself;
+# an unchanged chunk keeps its embedding but must pick these up from the new upload
+POSITION_KEYS = ("chunk_id", "page", "total_pages", "section_title", "sheet", "row", "row_start", "row_end")
+
+ProgressCallback = Callable[[Dict[str, int]], None]
+
+# Concurrent uploads share one embedding model: cap the batches it encodes at once
+_embedding_slots = threading.BoundedSemaphore(INGEST_EMBED_CONCURRENCY)
+
+
+class IngestCancelled(Exception):
+    """
+    Raised inside ingest_file when its should_cancel hook returns True.
+    """
+
+
+def chunk_fingerprint(source: str, text: str) -> str:
+    """
+    Stable chunk identity: same source + same text -> same stored document ID.
+    Callers scope `source` to the user, so two users uploading the same file never
+    share (or overwrite) each other's rows.
+    """
+    return hashlib.sha256(f"{source}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def _iter_pages(loader, progress: Dict[str, int], report: ProgressCallback) -> Iterator[Document]:
+    """
+    Stage 1: Lazy page loading. Only the current page is held in memory.
+    """
+    for page in loader.lazy_load():
+        progress["parse"] += 1
+        report(progress)
+        yield page
+
+
+def _iter_chunks(
+    pages: Iterable[Document], text_splitter, progress: Dict[str, int]
+) -> Iterator[Document]:
+    """
+    Stage 2: Incremental splitting, one page at a time.
+    Without a splitter, loader output is already chunked (XLSX row groups, CSV rows).
+    """
+    for page in pages:
+        for chunk in (text_splitter.split_documents([page]) if text_splitter else [page]):
+            progress["chunk"] += 1
+            yield chunk
+
+
+def _batched(items: Iterable[Document], size: int) -> Iterator[List[Document]]:
+    batch: List[Document] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def ingest_file(
+    file_obj,
+    filename: str,
+    user_id: str,
+    session_id: str,
+    progress_callback: Optional[ProgressCallback] = None,
+    should_cancel: Optional[Callable[[], bool]] = None
+) -> int:
     """
     Implements Step 1 (Ingestion) & Step 2 (Chunking) & Step 3 (Metadata).
-    Also triggers Step 12 (Cleanup).
+    Also schedules Step 12 (Cleanup) with the background session reaper.
+
+    Runs as a generator pipeline: pages -> chunks -> fixed-size batches -> embed -> store,
+    so memory stays bounded by INGEST_BATCH_SIZE and early chunks are searchable
+    before the rest of the document is parsed.
+
+    In INGEST_MODE="incremental" only chunks with a new fingerprint are embedded and
+    written; unchanged chunks are re-tagged to the new session and anything the user
+    had stored that is not in this upload is left for the session reaper to delete.
+
+    `should_cancel` is checked between batches; when it returns True the pipeline stops
+    with IngestCancelled (batches already stored stay, a re-upload skips them).
     """
     print(f"Ingesting {filename} for Session: {session_id}")
-    
-    # 1. Save temp file
-    temp_path = f"temp_{filename}"
-    with open(temp_path, "wb") as f:
-        f.write(file_obj.getvalue())
-        
-    try:
-        # Step 1: Ingestion
-        if filename.endswith(".pdf"):
-            loader = PyPDFLoader(temp_path)
-        elif filename.endswith(".txt"):
-            loader = TextLoader(temp_path)
-        elif filename.endswith(".csv"):
-            loader = CSVLoader(temp_path)
-        else:
-            raise ValueError("Unsupported file format")
-            
-        pages = loader.load()
-        print(f" -> Loaded {len(pages)} pages.")
-        
-        # Step 2: Intelligent Chunking (Optimized Size)
+    progress = {stage: 0 for stage in STAGES}
+    progress["unchanged"] = 0
+    report = progress_callback or (lambda _: None)
+
+    # Step 1: Ingestion
+    # Loaders read the upload buffer in place: no temp_{filename} copy in the working
+    # directory, so concurrent uploads of the same filename cannot clobber each other.
+    if filename.endswith(".pdf"):
+        # Page range split across a process pool (serial for small files)
+        loader = ParallelPDFLoader(
+            file_obj, source=filename, workers=PDF_EXTRACT_WORKERS, min_pages=PDF_PARALLEL_MIN_PAGES
+        )
+    elif filename.endswith(".txt"):
+        loader = BufferTextLoader(file_obj, source=filename)
+    elif filename.endswith(".csv"):
+        loader = BufferCSVLoader(file_obj, source=filename)
+    elif filename.endswith(".xlsx"):
+        # Streams rows in read-only mode; yields table-aware chunks with the header repeated
+        loader = BufferXLSXLoader(
+            file_obj, source=filename, max_chars=CHUNK_SIZE, max_rows=XLSX_MAX_ROWS_PER_CHUNK
+        )
+    else:
+        raise ValueError("Unsupported file format")
+
+    # Step 2: Intelligent Chunking (Optimized Size)
+    # Spreadsheet chunks are already row-aligned and CSV documents are single records;
+    # a splitter would only cut rows apart (or read "COLUMN: value" lines as headings).
+    if isinstance(loader, (BufferXLSXLoader, BufferCSVLoader)):
+        text_splitter = None
+    elif CHUNKER == "structured":
+        # Token-sized chunks along headings / notes / tables, tagged with section_title
+        text_splitter = StructuredChunker(
+            hf_token_counter(get_embedding_tokenizer()), max_tokens=CHUNK_MAX_TOKENS, min_tokens=CHUNK_MIN_TOKENS
+        )
+    else:
         text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=CHUNK_SIZE,
             chunk_overlap=CHUNK_OVERLAP
         )
-        chunks = text_splitter.split_documents(pages)
-        
+
+    # Pins the user against the session reaper while their chunks are diffed and re-tagged
+    reaper = get_session_reaper()
+    with reaper.ingesting(user_id, session_id):
+        vectorstore = FinRAGVectorStore()
+        incremental = INGEST_MODE == "incremental"
+        if incremental:
+            # Incremental: diff against what the user already has instead of wiping it
+            existing = vectorstore.get_chunk_metadata({"user_id": user_id}, POSITION_KEYS)
+            print(f" -> Incremental mode: {len(existing)} chunks already stored for user.")
+        else:
+            # Full: every chunk is written again; IDs are scoped to the session so they
+            # cannot collide with the older copies the reaper has not deleted yet
+            existing = {}
+
         # Step 3: Metadata Enrichment
         # Prevents context loss and enables traceability.
         timestamp = datetime.datetime.now().isoformat()
-        
-        for i, chunk in enumerate(chunks):
-            chunk.metadata["chunk_id"] = i
-            chunk.metadata["source"] = filename
-            chunk.metadata["user_id"] = user_id
-            chunk.metadata["session_id"] = session_id  # Traceability
-            chunk.metadata["upload_timestamp"] = timestamp
-            
-            # Simulated "Section" metadata (page number serves as proxy)
-            if "page" not in chunk.metadata:
-                chunk.metadata["page"] = "Unknown"
-        
-        print(f" -> Created {len(chunks)} chunks with metadata.")
-        
-        # Step 12: Cleanup (No Waste)
-        vectorstore = FinRAGVectorStore()
-        vectorstore.delete_user_data(user_id)
-        
-        # Step 3 (Store): Embedding & Vector Storage
-        vectorstore.add_documents(chunks)
-        
-        return len(chunks)
-        
-    finally:
-        # Local Cleanup
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
+        session_values = {"session_id": session_id, "upload_timestamp": timestamp}
+        seen = set()
+
+        # Per-session inverted index for hybrid (BM25 + vector) retrieval
+        lexical_index = get_lexical_registry().create(user_id, session_id) if HYBRID_RETRIEVAL else None
+        # Bounded, evenly spaced chunk groups for the background summary (only when enabled)
+        summary_groups = ChunkGroups(SUMMARY_GROUP_CHARS, SUMMARY_MAX_GROUPS) if SUMMARY_ENABLED else None
+
+        def new_chunk_batches() -> Iterator[Tuple[Tuple[List[Document], List[str]], List[str]]]:
+            """
+            Tags every chunk, updates the lexical index and re-tags unchanged chunks;
+            yields ((new_chunks, new_ids), texts) for the batches that need embedding.
+            """
+            chunks = _iter_chunks(_iter_pages(loader, progress, report), text_splitter, progress)
+            for batch in _batched(chunks, INGEST_BATCH_SIZE):
+                if should_cancel and should_cancel():
+                    print(f" -> Ingestion of {filename} cancelled after {progress['chunk']} chunks.")
+                    raise IngestCancelled(filename)
+                new_chunks, new_ids, unchanged_ids = [], [], []
+                moved: Dict[str, Dict] = {}
+                session_chunks, session_ids = [], []
+                for chunk in batch:
+                    fingerprint = chunk_fingerprint(f"{user_id}\x00{filename}", chunk.page_content)
+                    if not incremental:
+                        fingerprint = chunk_fingerprint(session_id, fingerprint)
+                    if fingerprint in seen:
+                        # Verbatim repeat inside this document (boilerplate); already covered
+                        continue
+                    seen.add(fingerprint)
+
+                    chunk.metadata["chunk_id"] = len(seen) - 1
+                    chunk.metadata["source"] = filename
+                    chunk.metadata["user_id"] = user_id
+                    chunk.metadata.update(session_values)  # Traceability
+
+                    # Section title comes from the structured chunker; page number is the fallback
+                    if "page" not in chunk.metadata:
+                        chunk.metadata["page"] = "Unknown"
+
+                    session_chunks.append(chunk)
+                    session_ids.append(fingerprint)
+                    if fingerprint in existing:
+                        position = {key: chunk.metadata.get(key) for key in POSITION_KEYS}
+                        if position == existing[fingerprint]:
+                            unchanged_ids.append(fingerprint)
+                        else:
+                            # Same text at a new position (e.g. a page inserted in front)
+                            moved[fingerprint] = {**session_values, **position}
+                        continue
+                    new_chunks.append(chunk)
+                    new_ids.append(fingerprint)
+
+                # Lexical index covers every chunk of the session, new or unchanged
+                if lexical_index is not None:
+                    lexical_index.add(session_chunks, session_ids)
+                if summary_groups is not None:
+                    for chunk in session_chunks:
+                        summary_groups.add(chunk.page_content)
+
+                # Unchanged chunks stay in place; only their session tags (and position, if moved) change
+                if unchanged_ids:
+                    vectorstore.update_chunk_metadata(unchanged_ids, session_values)
+                if moved:
+                    vectorstore.update_chunks(moved)
+                if unchanged_ids or moved:
+                    progress["unchanged"] += len(unchanged_ids) + len(moved)
+                    report(progress)
+
+                if new_chunks:
+                    yield (new_chunks, new_ids), [c.page_content for c in new_chunks]
+
+        # Step 3 (Store): Embedding & Vector Storage, one batch at a time
+        if EMBEDDING_POOL_ENABLED:
+            # Bulk mode: batches are sharded across embedding worker processes and come
+            # back in order, so storing overlaps with embedding of the following batches
+            embedded = embed_stream(
+                vectorstore.embedding, new_chunk_batches(), workers=EMBEDDING_POOL_WORKERS, slots=_embedding_slots
+            )
+        else:
+            def embed_inline():
+                for payload, _ in new_chunk_batches():
+                    # The slot covers the model call only, not the caller storing the batch
+                    with _embedding_slots:
+                        vectors = vectorstore.embed_documents(payload[0])
+                    yield payload, vectors
+            embedded = embed_inline()
+
+        for (new_chunks, new_ids), vectors in embedded:
+            progress["embed"] += len(new_chunks)
+            report(progress)
+
+            vectorstore.add_embedded_documents(new_chunks, vectors, ids=new_ids)
+            progress["store"] += len(new_chunks)
+            report(progress)
+
+        # Step 12: Cleanup (No Waste), off the request path: chunks that disappeared from
+        # the document (or belong to older uploads) are deleted by the session reaper
+        stale = len(existing.keys() - seen)
+        if reaper.supersede(user_id, session_id):
+            get_lexical_registry().drop_user(user_id, keep_session=session_id)
+            get_summarizer().drop_user(user_id, keep_session=session_id)
+            if summary_groups is not None and summary_groups.chunks:
+                # Map-reduce summary for SUMMARY-intent questions, built off the request path
+                get_summarizer().submit(user_id, session_id, filename, summary_groups)
+            # Cached answers were built from the superseded chunks
+            get_answer_cache().drop_user(user_id)
+        else:
+            # A newer upload of this user finished first and stays active; this one is discarded
+            get_lexical_registry().drop_session(user_id, session_id)
+            print(f" -> Session {session_id} was superseded by a newer upload while ingesting.")
+        print(
+            f" -> Parsed {progress['parse']} pages | new: {progress['store']} | "
+            f"unchanged: {progress['unchanged']} | queued for cleanup: {stale}"
+        )
+        return progress["store"] + progress["unchanged"]
@@ -0,0 +1,133 @@
+import math
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+import streamlit as st
+from langchain_core.documents import Document
+
+# Keeps financial tokens whole: "ebitda", "10-k", "2.5", "us0378331005", "note 14" -> "note", "14"
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.\-/][a-z0-9]+)*")
+
+
+# Function words carry no lexical signal and would make every chunk a "hit"
+STOPWORDS = frozenset(
+    "a an and are as at be by did do does for from has have how in is it its of on or "
+    "the this that to was were what when where which who why with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Compact in-memory inverted index for one session.
+    Postings are packed arrays (doc index uint32, term frequency uint16) per term;
+    scoring is Okapi BM25 accumulated with NumPy.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        self._lengths = array("I")
+        self._total_length = 0
+        self.ids: List[str] = []
+        self.documents: List[Document] = []
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, documents: List[Document], ids: List[str]):
+        with self._lock:
+            for doc, doc_id in zip(documents, ids):
+                row = len(self.ids)
+                counts = Counter(tokenize(doc.page_content))
+                for term, tf in counts.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = (array("I"), array("H"))
+                    postings[0].append(row)
+                    postings[1].append(min(tf, 65535))
+                length = sum(counts.values())
+                self._lengths.append(length)
+                self._total_length += length
+                self.ids.append(doc_id)
+                self.documents.append(Document(id=doc_id, page_content=doc.page_content, metadata=dict(doc.metadata)))
+
+    def search(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        """
+        Top-k documents by BM25 score; only documents sharing at least one query term.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            n = len(self.ids)
+            if n == 0 or not terms:
+                return []
+            # np.array copies through the buffer protocol; a frombuffer view would block later appends
+            lengths = np.array(self._lengths, dtype=np.float32)
+            norm = self.k1 * (1.0 - self.b + self.b * lengths / (self._total_length / n))
+            scores = np.zeros(n, dtype=np.float32)
+            for term in terms:
+                postings = self._postings.get(term)
+                if postings is None:
+                    continue
+                rows = np.array(postings[0], dtype=np.int64)
+                tf = np.array(postings[1], dtype=np.float32)
+                df = len(rows)
+                idf = math.log(1.0 + (n - df + 0.5) / (df + 0.5))
+                scores[rows] += idf * tf * (self.k1 + 1.0) / (tf + norm[rows])
+
+            hits = np.flatnonzero(scores > 0)
+            if len(hits) > k:
+                hits = hits[np.argpartition(-scores[hits], k - 1)[:k]]
+            hits = hits[np.argsort(-scores[hits])]
+            return [
+                (Document(id=self.ids[i], page_content=self.documents[i].page_content, metadata=dict(self.documents[i].metadata)), float(scores[i]))
+                for i in hits
+            ]
+
+
+class LexicalIndexRegistry:
+    """
+    Per (user_id, session_id) BM25 indexes, built during ingestion.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[Tuple[str, str], BM25Index] = {}
+        self._lock = threading.Lock()
+
+    def create(self, user_id: str, session_id: str) -> BM25Index:
+        with self._lock:
+            index = self._indexes[(user_id, session_id)] = BM25Index()
+            return index
+
+    def get(self, user_id: str, session_id: str) -> Optional[BM25Index]:
+        with self._lock:
+            return self._indexes.get((user_id, session_id))
+
+    def drop_session(self, user_id: str, session_id: str):
+        with self._lock:
+            self._indexes.pop((user_id, session_id), None)
+
+    def drop_user(self, user_id: str, keep_session: Optional[str] = None):
+        """
+        Mirrors Step 12 cleanup: a new upload supersedes the user's older sessions.
+        """
+        with self._lock:
+            for key in [k for k in self._indexes if k[0] == user_id and k[1] != keep_session]:
+                del self._indexes[key]
+
+
+@st.cache_resource
+def get_lexical_registry() -> LexicalIndexRegistry:
+    """
+    Process-wide lexical indexes (Cached), shared by ingestion and retrieval.
+    """
+    return LexicalIndexRegistry()
@@ -0,0 +1,224 @@
+import copy
+import random
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import streamlit as st
+from langchain_core.documents import Document
+
+
+class InsertManyError(Exception):
+    """
+    Partial insert failure; mirrors astrapy's CollectionInsertManyException.inserted_ids.
+    """
+
+    def __init__(self, message: str, inserted_ids: List[str]):
+        super().__init__(message)
+        self.inserted_ids = inserted_ids
+
+
+class InsertManyResult:
+    def __init__(self, inserted_ids: List[str]):
+        self.inserted_ids = inserted_ids
+
+
+class DeleteResult:
+    def __init__(self, deleted_count: int):
+        self.deleted_count = deleted_count
+
+
+class UpdateResult:
+    def __init__(self, matched_count: int, upserted: bool):
+        self.update_info = {"n": matched_count or int(upserted), "updatedExisting": bool(matched_count)}
+
+
+class LocalDocumentCodec:
+    """
+    Same row layout as langchain_astradb's default codec with content_field="page_content":
+    metadata nested under "metadata", so filters on metadata keys become "metadata.<key>".
+    """
+
+    def encode(self, content: str, document_id: str, vector: List[float], metadata: Dict[str, Any]) -> Dict[str, Any]:
+        return {"_id": document_id, "page_content": content, "$vector": list(vector), "metadata": metadata or {}}
+
+    def encode_filter(self, filter: Dict[str, Any]) -> Dict[str, Any]:
+        encoded = {}
+        for key, value in filter.items():
+            if key in ("$and", "$or"):
+                encoded[key] = [self.encode_filter(f) for f in value]
+            elif key.startswith("$") or key == "_id":
+                encoded[key] = value
+            else:
+                encoded[f"metadata.{key}"] = value
+        return encoded
+
+    def decode(self, row: Dict[str, Any]) -> Document:
+        return Document(page_content=row["page_content"], metadata=dict(row["metadata"]), id=row["_id"])
+
+
+def _get_path(row: Dict[str, Any], path: str):
+    value = row
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return None
+        value = value[part]
+    return value
+
+
+def _apply_set(row: Dict[str, Any], values: Dict[str, Any]):
+    for path, value in values.items():
+        target = row
+        *parents, leaf = path.split(".")
+        for part in parents:
+            target = target.setdefault(part, {})
+        target[leaf] = value
+
+
+def _matches(row: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(_matches(row, f) for f in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(_matches(row, f) for f in condition):
+                return False
+            continue
+        value = _get_path(row, key)
+        if isinstance(condition, dict):
+            for op, operand in condition.items():
+                if op == "$in" and value not in operand:
+                    return False
+                if op == "$nin" and value in operand:
+                    return False
+                if op == "$eq" and value != operand:
+                    return False
+                if op == "$ne" and value == operand:
+                    return False
+        elif value != condition:
+            return False
+    return True
+
+
+class LocalCollection:
+    """
+    In-process stand-in for the AstraDB collection API used by FinRAGVectorStore:
+    insert_many (DOCUMENT_ALREADY_EXISTS on an existing _id), replace_one, find (metadata
+    filter, $vector sort, similarity), update_one / update_many ($set), delete_many. Similarity is
+    (1 + cosine) / 2, as AstraDB reports it.
+
+    `latency_ms` / `per_row_ms` simulate request cost and `fail_rate` injects partial
+    insert failures, so the bulk-write path can be benchmarked offline.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, per_row_ms: float = 0.0, fail_rate: float = 0.0, seed: int = 0):
+        self.latency_ms = latency_ms
+        self.per_row_ms = per_row_ms
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _simulate(self, rows: int):
+        delay = (self.latency_ms + self.per_row_ms * rows) / 1000
+        if delay:
+            time.sleep(delay)
+
+    def insert_many(self, documents: Iterable[Dict[str, Any]], ordered: bool = False, **kwargs) -> InsertManyResult:
+        documents = list(documents)
+        self._simulate(len(documents))
+        with self._lock:
+            fail = self._rng.random() < self.fail_rate
+            cut = self._rng.randrange(len(documents)) if fail and documents else len(documents)
+        inserted, existing = [], []
+        with self._lock:
+            for doc in documents[:cut]:
+                if doc["_id"] in self._rows:
+                    existing.append(doc["_id"])  # Not overwritten; the rest of the batch still goes in
+                    continue
+                self._rows[doc["_id"]] = copy.deepcopy(doc)
+                inserted.append(doc["_id"])
+        if existing:
+            raise InsertManyError(
+                f"DOCUMENT_ALREADY_EXISTS: {len(existing)} of {len(documents)} rows, e.g. {existing[0]}", inserted
+            )
+        if cut < len(documents):
+            raise InsertManyError(f"simulated failure after {cut} of {len(documents)} rows", inserted)
+        return InsertManyResult(inserted)
+
+    def replace_one(self, filter: Dict[str, Any], replacement: Dict[str, Any], upsert: bool = False, **kwargs):
+        self._simulate(1)
+        with self._lock:
+            matched = next((doc_id for doc_id, row in self._rows.items() if _matches(row, filter)), None)
+            if matched is None and not upsert:
+                return UpdateResult(0, False)
+            doc_id = matched if matched is not None else replacement.get("_id", filter.get("_id"))
+            self._rows[doc_id] = {**copy.deepcopy(replacement), "_id": doc_id}
+        return UpdateResult(int(matched is not None), matched is None)
+
+    def find(
+        self,
+        filter: Optional[Dict[str, Any]] = None,
+        projection: Optional[Dict[str, Any]] = None,
+        sort: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        include_similarity: bool = False,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        self._simulate(0)
+        with self._lock:
+            rows = [row for row in self._rows.values() if _matches(row, filter or {})]
+
+        if sort and "$vector" in sort and rows:
+            query = np.array(sort["$vector"], dtype=np.float32)
+            matrix = np.array([row["$vector"] for row in rows], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+            similarity = (1 + (matrix @ query) / np.where(norms == 0, 1.0, norms)) / 2
+            order = np.argsort(-similarity)[:limit] if limit else np.argsort(-similarity)
+            rows = [dict(rows[i], **({"$similarity": float(similarity[i])} if include_similarity else {})) for i in order]
+        elif limit:
+            rows = rows[:limit]
+
+        if projection and projection.get("_id") and len(projection) == 1:
+            return [{"_id": row["_id"]} for row in rows]
+        keep_vector = bool(projection and (projection.get("$vector") or projection.get("*")))
+        return [
+            {k: copy.deepcopy(v) for k, v in row.items() if keep_vector or k != "$vector"}
+            for row in rows
+        ]
+
+    def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], **kwargs):
+        self._simulate(0)
+        with self._lock:
+            row = next((row for row in self._rows.values() if _matches(row, filter)), None)
+            if row is not None:
+                _apply_set(row, update.get("$set", {}))
+
+    def update_many(self, filter: Dict[str, Any], update: Dict[str, Any], **kwargs):
+        self._simulate(0)
+        with self._lock:
+            for row in self._rows.values():
+                if _matches(row, filter):
+                    _apply_set(row, update.get("$set", {}))
+
+    def delete_many(self, filter: Dict[str, Any], **kwargs) -> DeleteResult:
+        self._simulate(0)
+        with self._lock:
+            doomed = [i for i, row in self._rows.items() if _matches(row, filter)]
+            for doc_id in doomed:
+                del self._rows[doc_id]
+        return DeleteResult(len(doomed))
+
+    def count_documents(self, filter: Dict[str, Any], upper_bound: int = 10**9) -> int:
+        with self._lock:
+            return sum(1 for row in self._rows.values() if _matches(row, filter))
+
+
+@st.cache_resource
+def get_local_collection() -> LocalCollection:
+    """
+    Process-wide stand-in collection (Cached) for VECTOR_BACKEND="astradb-local".
+    """
+    return LocalCollection()
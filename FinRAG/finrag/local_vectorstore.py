@@ -0,0 +1,273 @@
+import threading
+import uuid
+from typing import List, Dict, Optional, Any, Tuple, Iterable
+
+import numpy as np
+import streamlit as st
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+# Metadata keys that select a partition instead of being scanned per row
+PARTITION_KEYS = ("user_id", "session_id")
+
+
+def _matches(metadata: Dict[str, Any], conditions: Dict[str, Any]) -> bool:
+    """
+    Equality match on metadata, with `{"$in": [...]}` / `{"$ne": v}` support (AstraDB filter subset).
+    """
+    for key, expected in conditions.items():
+        value = metadata.get(key)
+        if isinstance(expected, dict) and "$in" in expected:
+            if value not in expected["$in"]:
+                return False
+        elif isinstance(expected, dict) and "$ne" in expected:
+            if value == expected["$ne"]:
+                return False
+        elif value != expected:
+            return False
+    return True
+
+
+class _Partition:
+    """
+    One (user_id, session_id) slice of the index.
+    Vectors live in a single contiguous float32 matrix, unit-normalized on insert
+    so that cosine similarity is a plain matrix-vector product.
+    """
+
+    def __init__(self, dim: int, capacity: int = 256):
+        self.matrix = np.empty((capacity, dim), dtype=np.float32)
+        self.size = 0
+        self.ids: List[str] = []
+        self.documents: List[Document] = []
+
+    def append(self, vectors: np.ndarray, ids: List[str], documents: List[Document]):
+        needed = self.size + len(vectors)
+        if needed > self.matrix.shape[0]:
+            # Amortized growth: double the buffer instead of re-allocating per batch
+            grown = np.empty((max(needed, 2 * self.matrix.shape[0]), self.matrix.shape[1]), dtype=np.float32)
+            grown[:self.size] = self.matrix[:self.size]
+            self.matrix = grown
+        self.matrix[self.size:needed] = vectors
+        self.size = needed
+        self.ids.extend(ids)
+        self.documents.extend(documents)
+
+    def keep(self, mask: np.ndarray) -> int:
+        """
+        Compacts the partition to the rows where mask is True. Returns rows removed.
+        """
+        kept = np.flatnonzero(mask)
+        removed = self.size - len(kept)
+        if removed:
+            self.matrix[:len(kept)] = self.matrix[kept]
+            self.size = len(kept)
+            self.ids = [self.ids[i] for i in kept]
+            self.documents = [self.documents[i] for i in kept]
+        return removed
+
+    def mask(self, conditions: Dict[str, Any]) -> np.ndarray:
+        if not conditions:
+            return np.ones(self.size, dtype=bool)
+        return np.fromiter(
+            (_matches(doc.metadata, conditions) for doc in self.documents),
+            dtype=bool,
+            count=self.size
+        )
+
+
+class LocalVectorStore:
+    """
+    In-process vector store with the same call surface FinRAGVectorStore uses on AstraDB.
+    Exact (brute-force) cosine search; intended for session-sized corpora.
+    """
+
+    def __init__(self, embedding: Embeddings):
+        self.embedding = embedding
+        self._partitions: Dict[Tuple[Any, Any], _Partition] = {}
+        self._lock = threading.RLock()
+
+    # ---------------------------------------------------------
+    # Writes
+    # ---------------------------------------------------------
+    def add_documents(self, documents: List[Document], ids: Optional[List[str]] = None) -> List[str]:
+        vectors = self.embedding.embed_documents([d.page_content for d in documents])
+        return self.add_embeddings(documents, vectors, ids=ids)
+
+    def add_embeddings(
+        self, documents: List[Document], vectors: List[List[float]], ids: Optional[List[str]] = None
+    ) -> List[str]:
+        """
+        Upserts pre-embedded documents, grouped by partition.
+        """
+        if not documents:
+            return []
+        ids = list(ids) if ids else [uuid.uuid4().hex for _ in documents]
+        matrix = np.array(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix /= np.maximum(norms, 1e-12)
+
+        groups: Dict[Tuple[Any, Any], List[int]] = {}
+        for i, doc in enumerate(documents):
+            key = tuple(doc.metadata.get(k) for k in PARTITION_KEYS)
+            groups.setdefault(key, []).append(i)
+
+        with self._lock:
+            # Upsert semantics: an existing id is replaced, not duplicated
+            self._delete_ids(set(ids))
+            for key, rows in groups.items():
+                partition = self._partitions.get(key)
+                if partition is None:
+                    partition = self._partitions[key] = _Partition(matrix.shape[1], capacity=max(256, len(rows)))
+                partition.append(
+                    matrix[rows],
+                    [ids[i] for i in rows],
+                    [Document(page_content=documents[i].page_content, metadata=dict(documents[i].metadata)) for i in rows]
+                )
+        return ids
+
+    def delete(self, filter: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Deletes every row matching the metadata filter. Returns rows removed.
+        """
+        removed = 0
+        with self._lock:
+            for key, partition, conditions in self._select(filter):
+                removed += partition.keep(~partition.mask(conditions))
+                if partition.size == 0:
+                    del self._partitions[key]
+        return removed
+
+    def delete_ids(self, ids: Iterable[str], filter: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Deletes the given rows, restricted to those that still match `filter` if given.
+        """
+        with self._lock:
+            return self._delete_ids(set(ids), filter)
+
+    def _delete_ids(self, ids: set, filter: Optional[Dict[str, Any]] = None) -> int:
+        removed = 0
+        for key, partition, conditions in self._select(filter):
+            if any(i in ids for i in partition.ids):
+                keep = np.fromiter((i not in ids for i in partition.ids), dtype=bool, count=partition.size)
+                if conditions:
+                    keep |= ~partition.mask(conditions)
+                removed += partition.keep(keep)
+                if partition.size == 0:
+                    del self._partitions[key]
+        return removed
+
+    def update_metadata(self, ids: Iterable[str], values: Dict[str, Any]) -> int:
+        """
+        Sets metadata fields on existing rows without re-embedding.
+        Rows move partitions when a partition key (e.g. session_id) changes.
+        """
+        return self.update_metadata_each({doc_id: values for doc_id in ids})
+
+    def update_metadata_each(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Same as update_metadata with different values per row, in a single pass.
+        """
+        ids = updates
+        moved_docs: List[Document] = []
+        moved_vectors: List[np.ndarray] = []
+        moved_ids: List[str] = []
+        with self._lock:
+            for partition in self._partitions.values():
+                for row, doc_id in enumerate(partition.ids):
+                    if doc_id in ids:
+                        moved_ids.append(doc_id)
+                        moved_docs.append(Document(
+                            page_content=partition.documents[row].page_content,
+                            metadata={**partition.documents[row].metadata, **updates[doc_id]}
+                        ))
+                        moved_vectors.append(partition.matrix[row].copy())
+            if moved_ids:
+                # Vectors are already normalized; re-normalizing in add_embeddings is a no-op
+                self.add_embeddings(moved_docs, np.vstack(moved_vectors), ids=moved_ids)
+        return len(moved_ids)
+
+    # ---------------------------------------------------------
+    # Reads
+    # ---------------------------------------------------------
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: Optional[Dict[str, Any]] = None
+    ) -> List[tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k=k, filter=filter)
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4, filter: Optional[Dict[str, Any]] = None
+    ) -> List[tuple[Document, float]]:
+        """
+        Vectorized cosine top-k. Scores are mapped to (1 + cos) / 2, the same scale
+        AstraDB reports for cosine collections, so retriever thresholds carry over.
+        """
+        query = np.array(embedding, dtype=np.float32)
+        query /= max(float(np.linalg.norm(query)), 1e-12)
+
+        candidates: List[Tuple[float, str, Document]] = []
+        with self._lock:
+            for _, partition, conditions in self._select(filter):
+                if partition.size == 0:
+                    continue
+                scores = partition.matrix[:partition.size] @ query
+                if conditions:
+                    scores = np.where(partition.mask(conditions), scores, -np.inf)
+                top = min(k, partition.size)
+                idx = np.argpartition(-scores, top - 1)[:top]
+                for i in idx:
+                    if np.isfinite(scores[i]):
+                        candidates.append((float(scores[i]), partition.ids[i], partition.documents[i]))
+
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        return [
+            (Document(id=doc_id, page_content=doc.page_content, metadata=dict(doc.metadata)), (1.0 + score) / 2.0)
+            for score, doc_id, doc in candidates[:k]
+        ]
+
+    def get_ids(self, filter: Optional[Dict[str, Any]] = None) -> List[str]:
+        with self._lock:
+            return [
+                partition.ids[i]
+                for _, partition, conditions in self._select(filter)
+                for i in np.flatnonzero(partition.mask(conditions))
+            ]
+
+    def get_metadata(self, filter: Optional[Dict[str, Any]], keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        keys = list(keys)
+        with self._lock:
+            return {
+                partition.ids[i]: {key: partition.documents[i].metadata.get(key) for key in keys}
+                for _, partition, conditions in self._select(filter)
+                for i in np.flatnonzero(partition.mask(conditions))
+            }
+
+    def count(self, filter: Optional[Dict[str, Any]] = None) -> int:
+        with self._lock:
+            return sum(int(p.mask(c).sum()) for _, p, c in self._select(filter))
+
+    def _select(self, filter: Optional[Dict[str, Any]]):
+        """
+        Resolves partition keys in the filter to partitions; returns the
+        remaining conditions to be evaluated row by row.
+        """
+        filter = dict(filter or {})
+        wanted = {k: filter.pop(k) for k in PARTITION_KEYS if k in filter and not isinstance(filter[k], dict)}
+        if len(wanted) == len(PARTITION_KEYS):
+            key = tuple(wanted[k] for k in PARTITION_KEYS)
+            return [(key, self._partitions[key], filter)] if key in self._partitions else []
+        selected = []
+        for key, partition in list(self._partitions.items()):
+            if all(key[PARTITION_KEYS.index(k)] == v for k, v in wanted.items()):
+                selected.append((key, partition, filter))
+        return selected
+
+
+@st.cache_resource
+def get_local_vectorstore(_embedding: Embeddings) -> LocalVectorStore:
+    """
+    Process-wide local index (Cached).
+    Shared by the app's retriever and the ingestion service so both see the same data.
+    """
+    print("Initializing in-process vector store...")
+    return LocalVectorStore(_embedding)
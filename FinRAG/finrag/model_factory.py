@@ -1,48 +1,224 @@
-import torch
+import copy
+import hashlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from typing import Iterator, List, Optional
+
 import streamlit as st
-from transformers import AutoTokenizer, AutoModelForCausalLM, pipeline
-from langchain_huggingface import HuggingFacePipeline, HuggingFaceEmbeddings
-from config import MODEL_NAME, EMBEDDING_MODEL
+from langchain_core.language_models.llms import LLM
+from config import (
+    MODEL_NAME,
+    MODEL_PRECISION,
+    EMBEDDING_MODEL,
+    EMBEDDING_BACKEND,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_CACHE_PATH,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    PREFIX_KV_CACHE
+)
+
+# Repository root: the model registry is shared with Fin_Personal_Assitant
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if _REPO_ROOT not in sys.path:
+    sys.path.insert(0, _REPO_ROOT)
+from finsmart_common.model_registry import get_model_registry  # noqa: E402
+from finsmart_common.inference_server import get_inference_server  # noqa: E402
+from finrag.embedding_backends import load_embeddings  # noqa: E402
 
 @st.cache_resource
 def get_huggingface_embeddings():
     """
     Loads the embedding model (Cached).
     User for Step 3 (Embedding).
+    Wrapped in a persistent content-hash cache so unchanged chunks are never re-embedded.
+    """
+    print(f"Loading embedding model {EMBEDDING_MODEL} ({EMBEDDING_BACKEND})...")
+    embeddings, variant = load_embeddings()
+
+    if EMBEDDING_CACHE_ENABLED:
+        from finrag.embedding_cache import EmbeddingCache, CachedEmbeddings
+        cache = EmbeddingCache(EMBEDDING_CACHE_PATH, max_entries=EMBEDDING_CACHE_MAX_ENTRIES)
+        print(f"Embedding cache enabled at {EMBEDDING_CACHE_PATH}")
+        return CachedEmbeddings(embeddings, cache, model_name=variant)
+    return embeddings
+
+@st.cache_resource
+def get_embedding_tokenizer():
+    """
+    Tokenizer of the embedding model (Cached), used to size chunks in tokens.
+    """
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+
+# Step 8 generation settings, shared by the pipeline and the streaming path
+GENERATION_KWARGS = dict(
+    max_new_tokens=768,    # Optimized for speed (was 1024)
+    do_sample=True,
+    temperature=0.1,       # Low temp for factual consistency
+    top_p=0.95,
+    repetition_penalty=1.15
+)
+
+@st.cache_resource
+def get_llm_components():
+    """
+    Loads the Finetuned Finance Model weights and tokenizer once (Cached).
+    Goes through the shared model registry, so a co-hosted app reuses the same copy.
+    Returns (tokenizer, model, device).
     """
-    print(f"Loading embedding model {EMBEDDING_MODEL}...")
-    return HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+    handle = get_model_registry().acquire(MODEL_NAME, precision=MODEL_PRECISION)
+    print(f"Device set to: {handle.device}")
+    for entry in get_model_registry().memory_report():
+        print(f"Model memory: {entry}")
+    return handle.tokenizer, handle.model, handle.device
+
+@st.cache_resource
+def warm_up_llm():
+    """
+    Starts loading the LLM on a background thread, once per process, so the UI
+    renders immediately. get_llm_components() waits for it if called earlier.
+    """
+    return get_model_registry().warm_up(MODEL_NAME, precision=MODEL_PRECISION)
+
+def llm_ready() -> bool:
+    return get_model_registry().is_loaded(MODEL_NAME, precision=MODEL_PRECISION)
+
+def llm_load_seconds() -> Optional[float]:
+    return get_model_registry().load_seconds(MODEL_NAME, precision=MODEL_PRECISION)
+
+class BatchedLLM(LLM):
+    """
+    LangChain LLM backed by the shared inference server: concurrent sessions are
+    batched into one generate() call. Returns the generated text only.
+    """
+    model_name: str = MODEL_NAME
+
+    @property
+    def _llm_type(self) -> str:
+        return "finsmart-batched"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs) -> str:
+        text = get_inference_server(self.model_name, precision=MODEL_PRECISION).generate(prompt, **GENERATION_KWARGS)
+        if stop:
+            for token in stop:
+                text = text.split(token)[0]
+        return text
 
 @st.cache_resource
 def get_llm():
     """
     Loads the Finetuned Finance Model.
     Step 8 (Answer Generation).
+    Requests go through the dynamic batching inference server.
     """
-    print(f"Loading LLM {MODEL_NAME}...")
-    
-    device = "mps" if torch.backends.mps.is_available() else "cpu"
-    print(f"Device set to: {device}")
-
-    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-    
-    # Force float32 for stability on Mac/MPS to prevent empty outputs
-    model = AutoModelForCausalLM.from_pretrained(
-        MODEL_NAME,
-        torch_dtype=torch.float32  
-    ).to(device)
-
-    pipe = pipeline(
-        "text-generation",
-        model=model,
-        tokenizer=tokenizer,
-        max_new_tokens=768,    # Optimized for speed (was 1024)
-        do_sample=True,
-        temperature=0.1,       # Low temp for factual consistency
-        top_p=0.95,
-        repetition_penalty=1.15,
-        return_full_text=True
-    )
-
-    llm = HuggingFacePipeline(pipeline=pipe)
-    return llm
+    get_llm_components()
+    return BatchedLLM()
+
+def submit_llm(prompt: str, **overrides) -> Future:
+    """
+    Queues a prompt on the shared inference server with the Step 8 generation settings
+    (`overrides` replace individual ones). Resolves to the generated text.
+    """
+    return get_inference_server(MODEL_NAME, precision=MODEL_PRECISION).submit(prompt, **{**GENERATION_KWARGS, **overrides})
+
+def inference_metrics() -> dict:
+    """
+    Throughput / queue-depth counters of the shared inference server.
+    """
+    return get_inference_server(MODEL_NAME, precision=MODEL_PRECISION).metrics()
+
+# Prefix KV-cache: (model, prefix hash) -> (prefix token ids, past_key_values)
+_prefix_cache = {}
+_prefix_cache_lock = threading.Lock()
+
+def _get_prefix_cache(prefix: str, tokenizer, model, device):
+    """
+    Prefills the static prompt prefix once and keeps its past_key_values.
+    Keyed by model and a hash of the rendered prefix, so a template or model change
+    builds a new entry (and drops the old one).
+    """
+    key = (MODEL_NAME, id(model), hashlib.sha256(prefix.encode("utf-8")).hexdigest())
+    with _prefix_cache_lock:
+        if key in _prefix_cache:
+            return _prefix_cache[key]
+
+        import torch
+        from transformers import DynamicCache
+
+        # The last prefix token may merge with the start of the context: leave it out
+        prefix_ids = tokenizer(prefix, return_tensors="pt").input_ids[:, :-1].to(device)
+        started = time.perf_counter()
+        with torch.no_grad():
+            past = model(input_ids=prefix_ids, past_key_values=DynamicCache(), use_cache=True).past_key_values
+        print(f"Prefix KV-cache: prefilled {prefix_ids.shape[1]} tokens in {time.perf_counter() - started:.2f}s")
+
+        _prefix_cache.clear()
+        _prefix_cache[key] = (prefix_ids, past)
+        return _prefix_cache[key]
+
+def stream_llm(prompt: str, prefix: Optional[str] = None) -> Iterator[str]:
+    """
+    Step 8 (Answer Generation), streaming variant.
+    Runs generate() on a worker thread and yields decoded text as tokens arrive,
+    so time-to-first-token is the user-facing latency. Only new text is yielded
+    (the prompt is not echoed).
+    When `prefix` (the fixed system-prompt part of `prompt`) is given, its cached
+    past_key_values are reused and only the rest of the prompt is prefilled.
+    If the consumer stops early (echo cut at "Human:", Streamlit rerun), generation
+    stops at the next token instead of decoding up to max_new_tokens in the background.
+    Streaming bypasses the inference server's queue (tokens go to one consumer) but
+    shares its model lock, so it never runs concurrently with a batch.
+    """
+    import torch
+    from transformers import StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+
+    tokenizer, model, device = get_llm_components()
+    model_lock = get_inference_server(MODEL_NAME, precision=MODEL_PRECISION).model_lock
+    inputs = tokenizer(prompt, return_tensors="pt").to(device)
+
+    cache_kwargs = {}
+    if PREFIX_KV_CACHE and prefix and prompt.startswith(prefix):
+        with model_lock:
+            prefix_ids, past = _get_prefix_cache(prefix, tokenizer, model, device)
+        cached = prefix_ids.shape[1]
+        # Reuse only if the full prompt tokenizes to the same leading ids
+        if inputs.input_ids.shape[1] > cached and torch.equal(inputs.input_ids[:, :cached], prefix_ids):
+            # generate() extends the cache in place: give it a private copy
+            cache_kwargs["past_key_values"] = copy.deepcopy(past)
+            print(f"Prefix KV-cache: reused {cached} tokens, prefilling {inputs.input_ids.shape[1] - cached}")
+        else:
+            print("Prefix KV-cache: token boundary mismatch, prefilling full prompt")
+
+    streamer = TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    errors = []
+    abandoned = threading.Event()
+
+    class _Abandoned(StoppingCriteria):
+        def __call__(self, input_ids, scores, **kwargs):
+            return torch.full((input_ids.shape[0],), abandoned.is_set(), dtype=torch.bool, device=input_ids.device)
+
+    def _generate():
+        try:
+            with model_lock, torch.no_grad():
+                model.generate(
+                    **inputs, streamer=streamer, stopping_criteria=StoppingCriteriaList([_Abandoned()]),
+                    **cache_kwargs, **GENERATION_KWARGS
+                )
+        except Exception as e:
+            errors.append(e)
+            streamer.end()  # unblock the consumer
+
+    worker = threading.Thread(target=_generate, daemon=True)
+    worker.start()
+    try:
+        for text in streamer:
+            yield text
+    finally:
+        # Normal end: no-op; early close (GeneratorExit) or error: stops generate()
+        abandoned.set()
+    worker.join()
+    if errors:
+        raise errors[0]
@@ -0,0 +1,125 @@
+import os
+import threading
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+def onnx_model_paths(model_name: str, cache_dir: str):
+    base = os.path.join(cache_dir, model_name.replace("/", "__"))
+    return os.path.join(base, "model.onnx"), os.path.join(base, "model.int8.onnx")
+
+
+def export_onnx(model_name: str, path: str):
+    """
+    One-time export of the transformer encoder (token embeddings out, pooling is done
+    in NumPy) with dynamic batch / sequence axes.
+    """
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    model = AutoModel.from_pretrained(model_name).eval()
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    axes = {n: {0: "batch", 1: "sequence"} for n in input_names + ["last_hidden_state"]}
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[n] for n in input_names),
+            path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=axes,
+            opset_version=17,
+            dynamo=False,
+        )
+    print(f"Exported {model_name} to {path}")
+
+
+def quantize_onnx(source: str, target: str):
+    # Dynamic int8: weights stored as int8, activations quantized per batch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    quantize_dynamic(source, target, weight_type=QuantType.QInt8)
+    print(f"Quantized {source} -> {target}")
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence-transformers model (mean pooling + L2 normalization) run with ONNX Runtime.
+
+    The model is exported on first use into `cache_dir` (and int8-quantized when
+    `quantize`). Texts are length-sorted into batches to minimise padding; results come
+    back in input order. `threads` sets ONNX Runtime's intra-op threads (0 = its default).
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        cache_dir: str,
+        quantize: bool = True,
+        threads: int = 0,
+        batch_size: int = 64,
+        max_length: int = 256,
+    ):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError("EMBEDDING_BACKEND=onnx needs `pip install onnxruntime onnx`") from e
+        from transformers import AutoTokenizer
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        fp32_path, int8_path = onnx_model_paths(model_name, cache_dir)
+        if not os.path.exists(fp32_path):
+            export_onnx(model_name, fp32_path)
+        path = fp32_path
+        if quantize:
+            if not os.path.exists(int8_path):
+                quantize_onnx(fp32_path, int8_path)
+            path = int8_path
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        # The tokenizer is not safe to share across concurrent calls
+        self._lock = threading.Lock()
+        print(f"ONNX embeddings: {path} (threads={threads or 'default'})")
+
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        with self._lock:
+            encoded = self.tokenizer(
+                texts, padding=True, truncation=True, max_length=self.max_length, return_tensors="np"
+            )
+        feeds = {k: v.astype(np.int64) for k, v in encoded.items() if k in self.input_names}
+        hidden = self.session.run(["last_hidden_state"], feeds)[0]
+
+        mask = encoded["attention_mask"][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        return pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            batch = self._embed_batch([texts[i] for i in idx])
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            vectors[idx] = batch
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
@@ -0,0 +1,133 @@
+# Parallel PDF page extraction.
+# Kept free of streamlit / torch imports: worker processes import this module only.
+import atexit
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import List, Tuple, Iterator, Optional
+
+from pypdf import PdfReader
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+# Lower bound on pages per task: each task re-opens the PDF and re-reads its xref table
+MIN_PAGES_PER_TASK = 8
+
+# RAM-backed directory for the one file copy worker processes need (if available)
+TMPFS_DIR = "/dev/shm"
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+
+def extract_page_range(path: str, start: int, end: int) -> List[Tuple[int, str]]:
+    """
+    Worker task: text of pages [start, end) as (page_number, text) pairs.
+    """
+    reader = PdfReader(path)
+    return [(i, reader.pages[i].extract_text()) for i in range(start, end)]
+
+
+def _get_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    One pool per process, reused across uploads ("spawn" avoids forking a process
+    that already holds model threads).
+    """
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+@atexit.register
+def _shutdown_pool():
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+
+
+def upload_buffer(file_obj) -> memoryview:
+    """
+    Zero-copy view of an uploaded file (Streamlit's UploadedFile is a BytesIO).
+    """
+    if hasattr(file_obj, "getbuffer"):
+        return file_obj.getbuffer()
+    return memoryview(file_obj.getvalue())
+
+
+@contextmanager
+def spill_to_tmpfs(buffer: memoryview, suffix: str) -> Iterator[str]:
+    """
+    Writes the buffer to a uniquely named temp file (tmpfs when available) and
+    removes it on exit. Unique names keep concurrent uploads from clobbering each other.
+    """
+    directory = TMPFS_DIR if os.path.isdir(TMPFS_DIR) and os.access(TMPFS_DIR, os.W_OK) else None
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="finrag_", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(buffer)
+        yield path
+    finally:
+        os.remove(path)
+
+
+class ParallelPDFLoader(BaseLoader):
+    """
+    Drop-in for PyPDFLoader that reads the upload from memory.
+    Splits the page range across a process pool and yields pages in document order
+    with the same `source` / `page` metadata. Falls back to serial parsing below `min_pages`.
+    """
+
+    def __init__(self, file_obj, source: str, workers: int = 0, min_pages: int = 50):
+        self.file_obj = file_obj
+        self.source = source
+        self.workers = workers or os.cpu_count() or 1
+        self.min_pages = min_pages
+
+    def _document(self, page: int, text: str, total_pages: int) -> Document:
+        return Document(
+            page_content=text,
+            metadata={"source": self.source, "page": page, "total_pages": total_pages}
+        )
+
+    def lazy_load(self) -> Iterator[Document]:
+        self.file_obj.seek(0)
+        reader = PdfReader(self.file_obj)
+        total_pages = len(reader.pages)
+
+        if self.workers <= 1 or total_pages < self.min_pages:
+            print(f" -> Parsing {total_pages} pages serially.")
+            for i, page in enumerate(reader.pages):
+                yield self._document(i, page.extract_text(), total_pages)
+            return
+        del reader
+
+        pages_per_task = max(MIN_PAGES_PER_TASK, math.ceil(total_pages / (self.workers * 2)))
+        ranges = [(start, min(start + pages_per_task, total_pages)) for start in range(0, total_pages, pages_per_task)]
+        print(f" -> Parsing {total_pages} pages on {self.workers} processes ({len(ranges)} tasks).")
+
+        pool = _get_pool(self.workers)
+        # Worker processes cannot share the in-memory buffer, so they get one tmpfs path
+        with spill_to_tmpfs(upload_buffer(self.file_obj), suffix=".pdf") as path:
+            # Bounded window of in-flight tasks: keeps order and caps buffered text
+            pending = deque()
+            tasks = iter(ranges)
+            for start, end in tasks:
+                pending.append(pool.submit(extract_page_range, path, start, end))
+                if len(pending) >= self.workers * 2:
+                    break
+            while pending:
+                for page, text in pending.popleft().result():
+                    yield self._document(page, text, total_pages)
+                next_task = next(tasks, None)
+                if next_task is not None:
+                    pending.append(pool.submit(extract_page_range, path, *next_task))
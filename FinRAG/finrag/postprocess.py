@@ -0,0 +1,85 @@
+import re
+from typing import Iterable, Iterator
+
+# Role / section markers the model sometimes echoes from the prompt
+ANSWER_MARKER = "ANSWER:"
+HUMAN_MARKER = "Human:"
+CODE_FENCES = ("```markdown", "```")
+_PARTIAL_FENCE_RE = re.compile(r"`{1,3}[a-z]{0,8}$")
+
+
+def _strip_fences(text: str) -> str:
+    for fence in CODE_FENCES:
+        text = text.replace(fence, "")
+    return text
+
+
+def clean_answer(text: str) -> str:
+    """
+    Step 8 post-processing for a complete generation (full text incl. prompt echo).
+    """
+    final_answer = _strip_fences(text).strip()
+
+    # Cleanup Echo
+    if ANSWER_MARKER in final_answer:
+        final_answer = final_answer.split(ANSWER_MARKER)[-1].strip()
+    elif HUMAN_MARKER in final_answer:
+        final_answer = final_answer.split(HUMAN_MARKER)[-1].strip()
+    return final_answer
+
+
+def clean_answer_stream(chunks: Iterable[str], lead_chars: int = 32) -> Iterator[str]:
+    """
+    Step 8 post-processing applied to a token stream (generated text only).
+
+    - Code fences are removed; text that may still grow into a fence or marker is
+      held back until the next token, so nothing is emitted half-way.
+    - An echoed "ANSWER:" / "Human:" header within the first `lead_chars` characters
+      is dropped together with anything before it (same rule as clean_answer).
+    - A "Human:" after that means the model started a new turn: the stream stops there.
+    """
+    hold = max(len(ANSWER_MARKER), len(HUMAN_MARKER)) - 1
+    buffer = ""
+    leading = True
+    chunks = iter(chunks)
+
+    while True:
+        chunk = next(chunks, None)
+        final = chunk is None
+        buffer += chunk or ""
+
+        # A trailing "`", "```mark"... may still become "```markdown": keep it raw for now
+        pending = ""
+        partial = None if final else _PARTIAL_FENCE_RE.search(buffer)
+        if partial and CODE_FENCES[0].startswith(partial.group()):
+            buffer, pending = buffer[:partial.start()], buffer[partial.start():]
+        buffer = _strip_fences(buffer)
+
+        if leading:
+            if ANSWER_MARKER in buffer:
+                buffer = buffer.split(ANSWER_MARKER)[-1]
+            elif HUMAN_MARKER in buffer:
+                buffer = buffer.split(HUMAN_MARKER)[-1]
+            if len(buffer) < lead_chars and not final:
+                buffer += pending
+                continue
+            leading = False
+            buffer = buffer.lstrip()
+
+        if HUMAN_MARKER in buffer:
+            head = buffer.split(HUMAN_MARKER)[0].rstrip()
+            if head:
+                yield head
+            # Close the producer too: stream_llm then stops generate() at the next token
+            getattr(chunks, "close", lambda: None)()
+            return
+        buffer = buffer.replace(ANSWER_MARKER, "")
+
+        if final:
+            if buffer.rstrip():
+                yield buffer.rstrip()
+            return
+        if len(buffer) > hold:
+            yield buffer[:-hold]
+            buffer = buffer[-hold:]
+        buffer += pending
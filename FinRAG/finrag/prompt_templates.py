@@ -49,3 +49,52 @@ FINRAG_PROMPT = ChatPromptTemplate.from_messages(
         ("human", FINRAG_USER_PROMPT),
     ]
 )
+
+
+def render_prompt_prefix() -> str:
+    """
+    The rendered prompt text that precedes {context}: identical for every query,
+    so its KV-cache can be computed once (see model_factory.stream_llm).
+    """
+    sentinel = "\x00FINRAG_CONTEXT\x00"
+    rendered = FINRAG_PROMPT.invoke({"context": sentinel, "question": ""}).to_string()
+    return rendered.split(sentinel)[0]
+
+
+# Precomputed document summaries (map-reduce, see summarizer.py)
+SUMMARY_SYSTEM_PROMPT = """
+You are FinRAG, a strict Financial Document Analyst.
+Summarize ONLY what is written. Keep figures, dates and names exact. Do not infer.
+"""
+
+# Map: one group of consecutive chunks
+SUMMARY_MAP_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", SUMMARY_SYSTEM_PROMPT),
+        ("human", """
+EXCERPT ({source}, part {part} of {parts}):
+{text}
+
+Summarize this excerpt in 3-5 factual bullet points.
+
+ANSWER:
+"""),
+    ]
+)
+
+# Reduce: section summaries -> one summary (applied repeatedly for long documents)
+SUMMARY_REDUCE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        ("system", SUMMARY_SYSTEM_PROMPT),
+        ("human", """
+SECTION SUMMARIES ({source}):
+{summaries}
+
+Combine these into one document summary, dropping repetition:
+1. Executive Summary (2-3 sentences)
+2. Key Points (bullet points)
+
+ANSWER:
+"""),
+    ]
+)
@@ -0,0 +1,141 @@
+import re
+from typing import Dict, List, Tuple
+
+# Financial acronyms -> expansion (matched case-insensitively as whole words)
+ACRONYMS: Dict[str, str] = {
+    "ebitda": "earnings before interest, taxes, depreciation and amortization",
+    "ebit": "earnings before interest and taxes",
+    "eps": "earnings per share",
+    "p/e": "price to earnings ratio",
+    "roe": "return on equity",
+    "roa": "return on assets",
+    "roce": "return on capital employed",
+    "roic": "return on invested capital",
+    "fcf": "free cash flow",
+    "capex": "capital expenditure",
+    "opex": "operating expenses",
+    "cogs": "cost of goods sold",
+    "sg&a": "selling, general and administrative expenses",
+    "d&a": "depreciation and amortization",
+    "r&d": "research and development",
+    "md&a": "management's discussion and analysis",
+    "yoy": "year over year",
+    "qoq": "quarter over quarter",
+    "cagr": "compound annual growth rate",
+    "wacc": "weighted average cost of capital",
+    "npv": "net present value",
+    "irr": "internal rate of return",
+    "ifrs": "international financial reporting standards",
+    "gaap": "generally accepted accounting principles",
+    "aum": "assets under management",
+    "nav": "net asset value",
+    "nii": "net interest income",
+    "nim": "net interest margin",
+    "cet1": "common equity tier 1",
+    "ltv": "loan to value",
+    "dso": "days sales outstanding",
+    "esg": "environmental, social and governance",
+    "ev": "enterprise value",
+}
+
+# Interchangeable terms in filings; the first entry of each group is the canonical one
+SYNONYMS: List[Tuple[str, ...]] = [
+    ("revenue", "sales", "turnover", "top line"),
+    ("net income", "net profit", "net earnings", "profit for the year", "bottom line"),
+    ("operating income", "operating profit"),
+    ("debt", "borrowings", "loans"),
+    ("expenses", "costs", "expenditure"),
+    ("dividend", "distribution", "payout"),
+    ("employees", "headcount", "staff", "workforce"),
+    ("shareholders", "stockholders", "equity holders"),
+    ("guidance", "outlook", "forecast"),
+    ("impairment", "write-down", "write-off"),
+    ("lease liabilities", "lease obligations", "leases", "right-of-use assets"),
+]
+
+_SCALES = {"k": 1e3, "thousand": 1e3, "m": 1e6, "mn": 1e6, "million": 1e6, "b": 1e9, "bn": 1e9, "billion": 1e9}
+_AMOUNT_RE = re.compile(
+    r"(?P<cur>[$€£]\s?)?(?<![\w.,])(?P<num>\d{1,3}(?:,\d{3})+(?:\.\d+)?|\d+(?:\.\d+)?)\s?(?P<scale>thousand|million|billion|mn|bn|k|m|b)\b",
+    re.IGNORECASE
+)
+_PERCENT_RE = re.compile(r"(\d+(?:\.\d+)?)\s?(?:percent|per cent|pct)\b", re.IGNORECASE)
+_FISCAL_RE = re.compile(r"\bFY\s?'?(\d{2}|\d{4})\b", re.IGNORECASE)
+
+
+def _word_re(term: str) -> re.Pattern:
+    return re.compile(rf"(?<![\w&/]){re.escape(term)}(?![\w&/])", re.IGNORECASE)
+
+
+_ACRONYM_RES = {acronym: _word_re(acronym) for acronym in ACRONYMS}
+_EXPANSION_RES = {acronym: _word_re(expansion) for acronym, expansion in ACRONYMS.items()}
+_SYNONYM_RES = [[(term, _word_re(term)) for term in group] for group in SYNONYMS]
+
+
+def expand_acronyms(query: str) -> str:
+    """
+    "EBITDA margin" -> "earnings before interest, ... (EBITDA) margin"; expansions
+    already spelled out are contracted instead, so both forms get searched.
+    """
+    rewritten = query
+    for acronym, pattern in _ACRONYM_RES.items():
+        rewritten = pattern.sub(lambda m: f"{ACRONYMS[acronym]} ({m.group(0)})", rewritten)
+    if rewritten != query:
+        return rewritten
+    for acronym, pattern in _EXPANSION_RES.items():
+        rewritten = pattern.sub(acronym.upper(), rewritten)
+    return rewritten
+
+
+def synonym_variants(query: str) -> List[str]:
+    """
+    One variant per alternative term of each synonym group found in the query.
+    """
+    variants = []
+    for group in _SYNONYM_RES:
+        for term, pattern in group:
+            if pattern.search(query):
+                variants.extend(pattern.sub(other, query, count=1) for other, _ in group if other != term)
+                break
+    return variants
+
+
+def _format_amount(value: float) -> str:
+    scale, name = (1e6, "million") if value >= 1e6 else (1e3, "thousand")
+    scaled = value / scale
+    return f"{scaled:,.{0 if scaled.is_integer() else 1}f} {name}"
+
+
+def normalize_numbers(query: str) -> str:
+    """
+    Writes amounts, percentages and fiscal years the way statements usually print them:
+    "$1.2bn" -> "$1,200 million", "5 percent" -> "5%", "FY24" -> "fiscal year 2024".
+    """
+    def amount(m: re.Match) -> str:
+        value = float(m.group("num").replace(",", "")) * _SCALES[m.group("scale").lower()]
+        return f"{(m.group('cur') or '').strip()}{_format_amount(value)}"
+
+    def fiscal(m: re.Match) -> str:
+        year = m.group(1)
+        return f"fiscal year {'20' + year if len(year) == 2 else year}"
+
+    query = _AMOUNT_RE.sub(amount, query)
+    query = _PERCENT_RE.sub(r"\1%", query)
+    return _FISCAL_RE.sub(fiscal, query)
+
+
+def rewrite_query(query: str, max_variants: int = 4) -> List[str]:
+    """
+    Cheap deterministic variants of `query` (original not included), most specific
+    first: number normalization, acronym expansion, then synonym swaps.
+    """
+    numbers = normalize_numbers(query)
+    candidates = [numbers, expand_acronyms(numbers)] + synonym_variants(numbers)
+
+    seen = {" ".join(query.lower().split())}
+    variants = []
+    for candidate in candidates:
+        key = " ".join(candidate.lower().split())
+        if key not in seen:
+            seen.add(key)
+            variants.append(candidate)
+    return variants[:max_variants]
@@ -1,10 +1,38 @@
-from typing import List, Dict, Optional
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError, wait
+from typing import List, Dict, Optional, Tuple
 from langchain_core.documents import Document
 from finrag.astradb_vectorstore import FinRAGVectorStore
+from finrag.lexical_index import get_lexical_registry
+from finrag.query_rewrite import rewrite_query
+from config import (
+    QUERY_EMBEDDING_CACHE_SIZE,
+    RETRIEVAL_MAX_WORKERS,
+    HYBRID_RETRIEVAL,
+    HYBRID_RRF_K,
+    HYBRID_CANDIDATE_MULTIPLIER,
+    HYBRID_LATENCY_BUDGET_MS,
+    QUERY_REWRITE_MODE,
+    QUERY_REWRITE_MAX_VARIANTS,
+    QUERY_REWRITE_BUDGET_MS
+)
 
 class FinRAGRetriever:
-    def __init__(self, vectorstore: FinRAGVectorStore):
+    def __init__(
+        self, vectorstore: FinRAGVectorStore, hybrid: bool = HYBRID_RETRIEVAL, rewrite_mode: str = QUERY_REWRITE_MODE
+    ):
         self.vectorstore = vectorstore
+        self.hybrid = hybrid
+        self.rewrite_mode = rewrite_mode
+
+        # LRU of query embeddings: repeated / trivially rephrased questions skip the model
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_cache_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=RETRIEVAL_MAX_WORKERS, thread_name_prefix="finrag-search")
+        # Separate pool: lexical searches are awaited from inside retrieve_many's search tasks
+        self._lexical_executor = ThreadPoolExecutor(max_workers=RETRIEVAL_MAX_WORKERS, thread_name_prefix="finrag-bm25")
 
     def detect_intent(self, question: str) -> str:
         """
@@ -16,46 +44,224 @@ class FinRAGRetriever:
             return "SUMMARY"
         return "SPECIFIC"
 
-    def retrieve(self, query: str, user_id: str, session_id: str) -> List[Document]:
+    @staticmethod
+    def normalize_query(query: str) -> str:
         """
-        Step 5: Context Retrieval.
-        Adapts depth based on intent.
-        Strictly filters by user identity and session.
+        Cache key: case, whitespace and trailing punctuation do not change the embedding target.
         """
-        intent = self.detect_intent(query)
-        print(f"Retrieval Request | Query: '{query}' | Intent: {intent} | User: {user_id}")
-        
+        return " ".join(query.lower().split()).rstrip("?!. ")
+
+    def embed_queries(self, queries: List[str]) -> List[List[float]]:
+        """
+        Embeds queries through the LRU cache; all misses go to the model in one batch.
+        """
+        keys = [self.normalize_query(q) for q in queries]
+        found: Dict[str, List[float]] = {}
+        with self._query_cache_lock:
+            for key in keys:
+                if key in self._query_cache:
+                    self._query_cache.move_to_end(key)
+                    found[key] = self._query_cache[key]
+
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        if missing:
+            vectors = self.vectorstore.embed_queries(missing)
+            found.update(zip(missing, vectors))
+            with self._query_cache_lock:
+                for key, vector in zip(missing, vectors):
+                    self._query_cache[key] = vector
+                while len(self._query_cache) > QUERY_EMBEDDING_CACHE_SIZE:
+                    self._query_cache.popitem(last=False)
+
+        print(f"Query embeddings: {len(keys) - len(missing)} cached, {len(missing)} embedded.")
+        return [found[key] for key in keys]
+
+    def embed_query(self, query: str) -> List[float]:
+        return self.embed_queries([query])[0]
+
+    def _retrieval_params(self, intent: str) -> Tuple[int, float]:
         # Adaptive Retrieval Depth
         # Summary: Needs broad context (but kept to 4 for speed optimization)
         # Specific: Needs focused context
         if intent == "SUMMARY":
             k = 4
-            score_threshold = 0.35 
+            score_threshold = 0.35
         else:
             k = 4
             score_threshold = 0.35
-        
+        return k, score_threshold
+
+    @staticmethod
+    def _doc_key(doc: Document) -> str:
+        # Stored chunk ID (content fingerprint); both result lists use the same IDs
+        return doc.id or doc.page_content
+
+    def _fuse(
+        self, dense_docs: List[Document], lexical_hits: List[Tuple[Document, float]], k: int
+    ) -> List[Document]:
+        """
+        Reciprocal rank fusion of validated dense results and BM25 hits.
+        Exact-token matches ("EBITDA", "Note 14", an ISIN) surface even when their
+        vector score falls under the threshold.
+        """
+        fused: Dict[str, float] = {}
+        docs: Dict[str, Document] = {}
+        for rank, doc in enumerate(dense_docs, start=1):
+            key = self._doc_key(doc)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (HYBRID_RRF_K + rank)
+            docs[key] = doc
+        for rank, (doc, score) in enumerate(lexical_hits, start=1):
+            key = self._doc_key(doc)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (HYBRID_RRF_K + rank)
+            docs.setdefault(key, doc).metadata["bm25_score"] = score
+
+        ranked = sorted(fused, key=fused.get, reverse=True)[:k]
+        for key in ranked:
+            docs[key].metadata["fusion_score"] = fused[key]
+        return [docs[key] for key in ranked]
+
+    def _search(
+        self, query: str, embedding: List[float], user_id: str, session_id: str
+    ) -> Tuple[List[Document], int]:
+        """
+        Returns (results, number of dense results above the score threshold). With hybrid
+        retrieval the results can be BM25 hits alone, so the count is what tells whether
+        the query actually matched anything semantically.
+        """
+        intent = self.detect_intent(query)
+        print(f"Retrieval Request | Query: '{query}' | Intent: {intent} | User: {user_id}")
+        k, score_threshold = self._retrieval_params(intent)
+        started = time.perf_counter()
+
+        # Hybrid: lexical search runs alongside the vector search (session index built at ingest)
+        lexical_index = get_lexical_registry().get(user_id, session_id) if self.hybrid else None
+        lexical_future = None
+        if lexical_index is not None:
+            lexical_future = self._lexical_executor.submit(lexical_index.search, query, k * HYBRID_CANDIDATE_MULTIPLIER)
+
         # Metadata Filters (Step 3 Requirement)
         filter_dict = {
             "user_id": user_id,
             "session_id": session_id
         }
-        
+
         # Step 6: Context Validation
-        results_with_scores = self.vectorstore.similarity_search_with_score(query, k=k, filter=filter_dict)
-        
+        fetch_k = k * HYBRID_CANDIDATE_MULTIPLIER if lexical_future is not None else k
+        results_with_scores = self.vectorstore.similarity_search_with_score_by_vector(embedding, k=fetch_k, filter=filter_dict)
+
         validated_docs = []
         rejected_count = 0
-        
+
         for doc, score in results_with_scores:
             if score >= score_threshold:
                 # Inject relevance score for transparency
-                doc.metadata["relevance_score"] = score 
+                doc.metadata["relevance_score"] = score
                 validated_docs.append(doc)
             else:
                 rejected_count += 1
-                
+
         if rejected_count > 0:
              print(f"Validation: Rejected {rejected_count} chunks below threshold {score_threshold}")
-        
-        return validated_docs
+
+        if lexical_future is not None:
+            budget_left = HYBRID_LATENCY_BUDGET_MS / 1000 - (time.perf_counter() - started)
+            try:
+                lexical_hits = lexical_future.result(timeout=max(0.0, budget_left))
+            except TimeoutError:
+                print(f"Hybrid: lexical search exceeded {HYBRID_LATENCY_BUDGET_MS} ms budget, using dense results only.")
+                lexical_hits = []
+            if lexical_hits:
+                print(f"Hybrid: fusing {len(validated_docs)} dense + {len(lexical_hits)} lexical candidates.")
+                return self._fuse(validated_docs, lexical_hits, k), len(validated_docs)
+
+        return validated_docs[:k], len(validated_docs)
+
+    def retrieve(self, query: str, user_id: str, session_id: str) -> List[Document]:
+        """
+        Step 5: Context Retrieval.
+        Adapts depth based on intent.
+        Strictly filters by user identity and session.
+
+        With QUERY_REWRITE_MODE="always" rewritten variants of the query are searched as
+        well; with "fallback" only when no dense result passes the score threshold
+        (BM25 hits alone do not count).
+        """
+        if self.rewrite_mode == "always":
+            return self._search_with_variants(query, user_id, session_id)
+        docs, validated = self._search(query, self.embed_query(query), user_id, session_id)
+        if validated or self.rewrite_mode != "fallback":
+            return docs
+        print("Query rewrite: no chunk above threshold, searching rewritten variants.")
+        return self._search_with_variants(query, user_id, session_id, original=docs)
+
+    def _search_with_variants(
+        self, query: str, user_id: str, session_id: str, original: Optional[List[Document]] = None
+    ) -> List[Document]:
+        """
+        Searches deterministic rewrites of `query` (acronyms, synonyms, number formats)
+        concurrently, next to the query itself unless its `original` results are given.
+        Result lists are merged by reciprocal rank fusion, deduplicated by chunk ID;
+        variant searches still running after QUERY_REWRITE_BUDGET_MS are dropped.
+        """
+        started = time.perf_counter()
+        variants = rewrite_query(query, QUERY_REWRITE_MAX_VARIANTS)
+        if not variants:
+            return original if original is not None else self._search(query, self.embed_query(query), user_id, session_id)[0]
+
+        # One embedding pass for the query and all its variants
+        embeddings = self.embed_queries(variants if original is not None else [query] + variants)
+        futures = [
+            self._executor.submit(self._search, variant, embedding, user_id, session_id)
+            for variant, embedding in zip(variants, embeddings[-len(variants):])
+        ]
+        if original is None:
+            # The original query's search is never dropped: it runs here, alongside the variants
+            original = self._search(query, embeddings[0], user_id, session_id)[0]
+
+        budget_left = QUERY_REWRITE_BUDGET_MS / 1000 - (time.perf_counter() - started)
+        done, late = wait(futures, timeout=max(0.0, budget_left))
+        variant_results = [f.result()[0] for f in futures if f in done]
+        if late:
+            print(f"Query rewrite: {len(late)} of {len(futures)} variant searches exceeded {QUERY_REWRITE_BUDGET_MS} ms budget.")
+
+        k, _ = self._retrieval_params(self.detect_intent(query))
+        merged = self._merge([original] + variant_results, k)
+        new = len({self._doc_key(d) for d in merged} - {self._doc_key(d) for d in original})
+        print(
+            f"Query rewrite: {len(variant_results)} variants merged, {new} chunks not found by the original query "
+            f"({(time.perf_counter() - started) * 1000:.0f} ms)"
+        )
+        return merged
+
+    def _merge(self, result_lists: List[List[Document]], k: int) -> List[Document]:
+        """
+        Reciprocal rank fusion of several ranked lists, one entry per chunk ID.
+        """
+        if len(result_lists) == 1:
+            return result_lists[0][:k]
+        fused: Dict[str, float] = {}
+        docs: Dict[str, Document] = {}
+        for results in result_lists:
+            for rank, doc in enumerate(results, start=1):
+                key = self._doc_key(doc)
+                fused[key] = fused.get(key, 0.0) + 1.0 / (HYBRID_RRF_K + rank)
+                docs.setdefault(key, doc)
+
+        ranked = sorted(fused, key=fused.get, reverse=True)[:k]
+        for key in ranked:
+            docs[key].metadata["fusion_score"] = fused[key]
+        return [docs[key] for key in ranked]
+
+    def retrieve_many(self, queries: List[str], user_id: str, session_id: str) -> List[List[Document]]:
+        """
+        Batched variant of retrieve for query expansion / follow-ups:
+        one embedding pass for all queries, then the searches run concurrently.
+        Results are returned in the order of `queries`.
+        """
+        if not queries:
+            return []
+        embeddings = self.embed_queries(queries)
+        return list(self._executor.map(
+            lambda pair: self._search(pair[0], pair[1], user_id, session_id)[0],
+            zip(queries, embeddings)
+        ))
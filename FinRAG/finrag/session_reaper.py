@@ -0,0 +1,268 @@
+import itertools
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from finrag.astradb_vectorstore import FinRAGVectorStore
+from finrag.lexical_index import get_lexical_registry
+from finrag.answer_cache import get_answer_cache
+from finrag.summarizer import get_summarizer
+from config import (
+    SESSION_TTL_S,
+    SESSION_REAP_INTERVAL_S,
+    SESSION_REAP_BATCH_SIZE,
+    SESSION_REAP_MAX_DELETES_PER_S
+)
+
+
+@dataclass
+class SessionRecord:
+    user_id: str
+    session_id: str
+    created_at: float = field(default_factory=time.time)
+    last_access: float = field(default_factory=time.time)
+
+    def expired(self, now: float, ttl_s: float) -> bool:
+        return now - self.last_access > ttl_s
+
+
+@dataclass
+class ReapReport:
+    sessions: int = 0
+    superseded: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+
+
+class SessionReaper:
+    """
+    Background garbage collection of stored chunks, so ingestion never waits on deletes.
+
+    Sessions are registered on upload and touched on every question. A daemon thread
+    wakes every `interval_s` and deletes the chunks of sessions idle for longer than
+    `ttl_s`, plus everything a user stored outside their newest upload (`supersede`).
+    "Newest" is by submission order (`register`), not completion: an older upload that
+    finishes after a newer one never takes over the session the UI is using.
+    Deletes go out in batches of `batch_size` IDs at most `max_deletes_per_s` rows/s,
+    each guarded by the session filter so chunks re-tagged to a newer session survive.
+
+    Retrieval is always filtered by session_id, so rows awaiting deletion are never
+    served. A user with an ingestion in progress (`ingesting`) is skipped: incremental
+    mode re-tags that user's existing chunks instead of re-embedding them.
+    """
+
+    def __init__(
+        self,
+        ttl_s: float = SESSION_TTL_S,
+        interval_s: float = SESSION_REAP_INTERVAL_S,
+        batch_size: int = SESSION_REAP_BATCH_SIZE,
+        max_deletes_per_s: float = SESSION_REAP_MAX_DELETES_PER_S,
+    ):
+        self.ttl_s = ttl_s
+        self.interval_s = interval_s
+        self.batch_size = batch_size
+        self.max_deletes_per_s = max_deletes_per_s
+
+        self._sessions: Dict[Tuple[str, str], SessionRecord] = {}
+        # user_id -> session to keep; everything else the user stored is garbage
+        self._superseded: Dict[str, str] = {}
+        # Submission order of uploads, and per user the newest one that finished
+        self._order: Dict[Tuple[str, str], int] = {}
+        self._counter = itertools.count()
+        self._kept: Dict[str, Tuple[int, str]] = {}
+        self._pinned: Counter = Counter()
+        self._lock = threading.Lock()
+        # Held around each delete batch: pinning a user waits for an in-flight batch
+        self._delete_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.reaped_sessions = 0
+        self.reclaimed_chunks = 0
+        self.last_run: Optional[ReapReport] = None
+
+    # ---------------------------------------------------------
+    # Session bookkeeping (request path: in-memory only)
+    # ---------------------------------------------------------
+    def touch(self, user_id: str, session_id: str):
+        now = time.time()
+        with self._lock:
+            record = self._sessions.get((user_id, session_id))
+            if record is None:
+                self._sessions[(user_id, session_id)] = SessionRecord(user_id, session_id, now, now)
+            else:
+                record.last_access = now
+
+    def register(self, user_id: str, session_id: str):
+        """
+        Records the submission order of an upload (first call wins).
+        """
+        with self._lock:
+            if (user_id, session_id) not in self._order:
+                self._order[(user_id, session_id)] = next(self._counter)
+
+    def supersede(self, user_id: str, keep_session: str) -> bool:
+        """
+        A finished upload replaces the user's older sessions: their chunks (including
+        ones from before a restart, unknown to this process) are queued for deletion.
+
+        Returns False when a newer upload of the user already finished: that one is
+        kept, and the late upload is queued for deletion instead.
+        """
+        self.register(user_id, keep_session)
+        with self._lock:
+            # An upload finishes once: its order is not needed after this
+            order = self._order.pop((user_id, keep_session))
+            newest = self._kept.get(user_id)
+            if newest is not None and newest[0] > order:
+                keep_session, current = newest[1], False
+            else:
+                self._kept[user_id] = (order, keep_session)
+                current = True
+            self._superseded[user_id] = keep_session
+            for key in [k for k in self._sessions if k[0] == user_id and k[1] != keep_session]:
+                del self._sessions[key]
+        self._wake.set()
+        return current
+
+    @contextmanager
+    def ingesting(self, user_id: str, session_id: str):
+        self.register(user_id, session_id)
+        self.touch(user_id, session_id)
+        with self._delete_lock:
+            with self._lock:
+                self._pinned[user_id] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._pinned[user_id] -= 1
+                if self._pinned[user_id] <= 0:
+                    del self._pinned[user_id]
+
+    # ---------------------------------------------------------
+    # Reaping (background thread)
+    # ---------------------------------------------------------
+    def _due(self) -> List[Tuple[str, Dict[str, Any], Optional[str]]]:
+        """
+        (user_id, chunk filter, expired session_id or None for a supersede) work items.
+        """
+        now = time.time()
+        with self._lock:
+            due = [
+                (user_id, {"user_id": user_id, "session_id": {"$ne": keep}}, None)
+                for user_id, keep in self._superseded.items()
+                if user_id not in self._pinned
+            ]
+            due += [
+                (r.user_id, {"user_id": r.user_id, "session_id": r.session_id}, r.session_id)
+                for r in self._sessions.values()
+                if r.expired(now, self.ttl_s) and r.user_id not in self._pinned
+            ]
+        return due
+
+    def _delete(self, vectorstore: FinRAGVectorStore, user_id: str, filter: Dict[str, Any]) -> Tuple[int, bool]:
+        """
+        Rate-limited batch deletes. Returns (chunks deleted, finished); stops early
+        when the user starts an ingestion.
+        """
+        ids = list(vectorstore.get_chunk_ids(filter))
+        deleted = 0
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start:start + self.batch_size]
+            started = time.perf_counter()
+            with self._delete_lock:
+                with self._lock:
+                    if user_id in self._pinned:
+                        return deleted, False
+                deleted += vectorstore.delete_chunks(batch, filter=filter)
+            budget = len(batch) / self.max_deletes_per_s if self.max_deletes_per_s else 0.0
+            time.sleep(max(0.0, budget - (time.perf_counter() - started)))
+        return deleted, True
+
+    def reap(self) -> ReapReport:
+        """
+        One pass over expired and superseded sessions.
+        """
+        report = ReapReport()
+        started = time.perf_counter()
+        due = self._due()
+        if due:
+            vectorstore = FinRAGVectorStore()
+        for user_id, filter, session_id in due:
+            try:
+                deleted, finished = self._delete(vectorstore, user_id, filter)
+            except Exception as e:
+                print(f"Session reaper: cleanup of {filter} failed ({e}), will retry")
+                continue
+            report.chunks += deleted
+            if not finished:
+                continue
+
+            with self._lock:
+                if session_id is None:
+                    keep = filter["session_id"]["$ne"]
+                    if self._superseded.get(user_id) == keep:
+                        del self._superseded[user_id]
+                else:
+                    self._sessions.pop((user_id, session_id), None)
+            if session_id is None:
+                # In-memory state of superseded sessions is dropped by ingestion itself
+                report.superseded += 1
+            else:
+                get_lexical_registry().drop_session(user_id, session_id)
+                get_answer_cache().drop_session(user_id, session_id)
+                get_summarizer().drop_session(user_id, session_id)
+                report.sessions += 1
+
+        report.seconds = time.perf_counter() - started
+        with self._lock:
+            self.reaped_sessions += report.sessions
+            self.reclaimed_chunks += report.chunks
+            self.last_run = report
+        if report.chunks or report.sessions:
+            print(
+                f"Session reaper: reclaimed {report.chunks} chunks from {report.sessions} expired sessions "
+                f"and {report.superseded} superseded uploads in {report.seconds:.2f}s"
+            )
+        return report
+
+    def _loop(self):
+        while True:
+            self._wake.wait(self.interval_s)
+            self._wake.clear()
+            try:
+                self.reap()
+            except Exception as e:
+                print(f"Session reaper error: {e}")
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="finrag-session-reaper", daemon=True)
+                self._thread.start()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "pending_supersedes": len(self._superseded),
+                "reaped_sessions": self.reaped_sessions,
+                "reclaimed_chunks": self.reclaimed_chunks,
+                "last_run_s": self.last_run.seconds if self.last_run else None,
+            }
+
+
+@st.cache_resource
+def get_session_reaper() -> SessionReaper:
+    """
+    Process-wide session reaper (Cached); its thread starts on first use.
+    """
+    reaper = SessionReaper()
+    reaper.start()
+    return reaper
@@ -0,0 +1,210 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import streamlit as st
+
+from finrag.model_factory import submit_llm
+from finrag.prompt_templates import SUMMARY_MAP_PROMPT, SUMMARY_REDUCE_PROMPT
+from finrag.postprocess import clean_answer
+from config import (
+    SUMMARY_REDUCE_FANIN,
+    SUMMARY_MAP_MAX_NEW_TOKENS,
+    SUMMARY_REDUCE_MAX_NEW_TOKENS
+)
+
+# Summary states
+PENDING, RUNNING, READY, FAILED = "pending", "running", "ready", "failed"
+
+
+@dataclass
+class DocumentSummary:
+    source: str
+    status: str = PENDING
+    text: str = ""
+    groups: int = 0
+    groups_total: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+
+class ChunkGroups:
+    """
+    Packs consecutive chunk texts into groups of about `group_chars` characters as
+    ingestion streams them in. Memory stays bounded: at most `max_groups` groups are
+    kept, evenly spaced over the document. Whenever the cap is exceeded every other kept
+    group is dropped and the sampling stride doubles, so between max_groups / 2 and
+    max_groups groups span the whole document.
+    """
+
+    def __init__(self, group_chars: int, max_groups: int):
+        self.group_chars = group_chars
+        self.max_groups = max(2, max_groups)
+        self.chunks = 0
+        self.total = 0
+        self._stride = 1
+        self._kept: List[str] = []
+        self._current: List[str] = []
+        self._size = 0
+
+    def add(self, text: str):
+        self.chunks += 1
+        if self._size and self._size + len(text) > self.group_chars:
+            self._close()
+        # Groups the stride skips are only counted, never buffered
+        if self.total % self._stride == 0:
+            self._current.append(text)
+        self._size += len(text)
+
+    def _close(self):
+        if self.total % self._stride == 0:
+            self._kept.append("\n".join(self._current))
+            if len(self._kept) > self.max_groups:
+                self._kept = self._kept[::2]
+                self._stride *= 2
+        self.total += 1
+        self._current, self._size = [], 0
+
+    def finish(self) -> Tuple[List[str], int]:
+        """
+        Returns (kept groups, total groups).
+        """
+        if self._size:
+            self._close()
+        return self._kept, self.total
+
+
+# Whole-document summary requests ("Summarize the report", "Give me an overview"),
+# not questions that merely mention the report or ask for a brief answer
+_DOCUMENT = r"(?:(?:the|this|whole|entire|full|uploaded)\s+)*(?:report|document|file|filing|pdf|upload|statements?)?"
+_SUMMARY_REQUEST_RES = [
+    re.compile(
+        r"^(?:please\s+|can you\s+|could you\s+)*(?:summari[sz]e|tl;?dr|"
+        r"(?:give|provide|write)(?:\s+me)?\s+(?:a|an)\s+(?:short\s+|brief\s+)?(?:summary|overview)(?:\s+of)?|"
+        r"(?:a\s+)?(?:summary|overview)(?:\s+of)?)\s*" + _DOCUMENT + r"\s*(?:please)?[?.!]*$"
+    ),
+    re.compile(r"^what(?:'s|\s+is)\s+(?:this|the)\s+(?:report|document|file|filing|pdf)\s+about[?.!]*$"),
+    re.compile(
+        r"^(?:what\s+are\s+)?(?:the\s+)?(?:key|main)\s+(?:points|takeaways|highlights)(?:\s+of)?\s*"
+        + _DOCUMENT + r"[?.!]*$"
+    ),
+]
+
+
+def asks_for_document_summary(question: str) -> bool:
+    """
+    True when the question asks for a summary of the whole document, which the
+    precomputed summary answers; anything more specific goes through retrieval.
+    """
+    question = " ".join(question.lower().split())
+    return any(pattern.match(question) for pattern in _SUMMARY_REQUEST_RES)
+
+
+class DocumentSummarizer:
+    """
+    Map-reduce summaries of ingested documents, built in the background per session.
+
+    Map: each chunk group is summarized; all groups are queued on the inference server
+    at once, so they run as batched generate() calls. Reduce: the group summaries are
+    combined SUMMARY_REDUCE_FANIN at a time until one is left.
+
+    One document is summarized at a time (a single worker), so summaries never take
+    more than their share of the LLM from interactive questions. A summary whose
+    session is superseded while it is being built is abandoned.
+    """
+
+    def __init__(self):
+        self._summaries: Dict[Tuple[str, str], DocumentSummary] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="finrag-summary")
+
+    def submit(self, user_id: str, session_id: str, source: str, groups: ChunkGroups):
+        summary = DocumentSummary(source=source)
+        with self._lock:
+            self._summaries[(user_id, session_id)] = summary
+        self._executor.submit(self._run, user_id, session_id, summary, groups)
+        print(f"Summary of {source} queued for session {session_id} ({groups.chunks} chunks)")
+
+    def get(self, user_id: str, session_id: str) -> Optional[DocumentSummary]:
+        with self._lock:
+            return self._summaries.get((user_id, session_id))
+
+    def _current(self, user_id: str, session_id: str, summary: DocumentSummary) -> bool:
+        with self._lock:
+            return self._summaries.get((user_id, session_id)) is summary
+
+    def _run(self, user_id: str, session_id: str, summary: DocumentSummary, groups: ChunkGroups):
+        if not self._current(user_id, session_id, summary):
+            return
+        summary.status = RUNNING
+        started = time.perf_counter()
+        try:
+            groups, summary.groups_total = groups.finish()
+            summary.groups = len(groups)
+
+            # Map
+            futures = [
+                submit_llm(
+                    SUMMARY_MAP_PROMPT.invoke(
+                        {"source": summary.source, "part": i + 1, "parts": len(groups), "text": text}
+                    ).to_string(),
+                    max_new_tokens=SUMMARY_MAP_MAX_NEW_TOKENS
+                )
+                for i, text in enumerate(groups)
+            ]
+            partials = [clean_answer(f.result()) for f in futures]
+
+            # Reduce (a one-group document still goes through once, for the output format)
+            while True:
+                if not self._current(user_id, session_id, summary):
+                    print(f"Summary of {summary.source} abandoned: session {session_id} superseded")
+                    return
+                futures = [
+                    submit_llm(
+                        SUMMARY_REDUCE_PROMPT.invoke(
+                            {"source": summary.source, "summaries": "\n\n".join(partials[i:i + SUMMARY_REDUCE_FANIN])}
+                        ).to_string(),
+                        max_new_tokens=SUMMARY_REDUCE_MAX_NEW_TOKENS
+                    )
+                    for i in range(0, len(partials), SUMMARY_REDUCE_FANIN)
+                ]
+                partials = [clean_answer(f.result()) for f in futures]
+                if len(partials) == 1:
+                    break
+
+            summary.text = partials[0]
+            summary.status = READY
+        except Exception as e:
+            summary.error = str(e)
+            summary.status = FAILED
+            print(f"Summary of {summary.source} failed: {e}")
+        finally:
+            summary.seconds = time.perf_counter() - started
+        if summary.status == READY:
+            print(
+                f"Summary of {summary.source} ready in {summary.seconds:.1f}s "
+                f"({summary.groups}/{summary.groups_total} groups)"
+            )
+
+    def drop_session(self, user_id: str, session_id: str):
+        with self._lock:
+            self._summaries.pop((user_id, session_id), None)
+
+    def drop_user(self, user_id: str, keep_session: Optional[str] = None):
+        """
+        Mirrors Step 12 cleanup: a new upload supersedes the user's older sessions.
+        """
+        with self._lock:
+            for key in [k for k in self._summaries if k[0] == user_id and k[1] != keep_session]:
+                del self._summaries[key]
+
+
+@st.cache_resource
+def get_summarizer() -> DocumentSummarizer:
+    """
+    Process-wide document summarizer (Cached), fed by ingestion and read by the app.
+    """
+    return DocumentSummarizer()
@@ -0,0 +1,32 @@
+import hashlib
+import unittest
+from unittest import mock
+
+from finrag.local_vectorstore import LocalVectorStore
+
+
+class FakeEmbeddings:
+    """
+    Deterministic hash vectors: no model download.
+    """
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        return [b / 255.0 for b in digest[:16]]
+
+
+def use_local_store(test: unittest.TestCase, store: LocalVectorStore):
+    """
+    Points FinRAGVectorStore at `store` with hash embeddings for the test's duration.
+    """
+    patches = [
+        mock.patch("finrag.astradb_vectorstore.VECTOR_BACKEND", "local"),
+        mock.patch("finrag.astradb_vectorstore.get_huggingface_embeddings", FakeEmbeddings),
+        mock.patch("finrag.local_vectorstore.get_local_vectorstore", lambda _: store),
+    ]
+    for patch in patches:
+        patch.start()
+        test.addCleanup(patch.stop)
@@ -0,0 +1,26 @@
+import unittest
+
+from finrag.answer_cache import SemanticAnswerCache, question_numbers
+
+
+class NumberGuardTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = SemanticAnswerCache(threshold=0.9)
+        self.cache.put("u", "s", [1.0, 0.0], "What was revenue in 2023?", "Revenue was 10.", ["c1"])
+
+    def test_different_year_is_a_miss(self):
+        # Same embedding on purpose: only the numbers differ
+        self.assertIsNone(self.cache.lookup("u", "s", [1.0, 0.0], "What was revenue in 2024?"))
+
+    def test_same_numbers_in_another_format_is_a_hit(self):
+        hit = self.cache.lookup("u", "s", [0.99, 0.05], "Revenue for fiscal year 2023?")
+        self.assertIsNotNone(hit)
+        self.assertEqual(hit.answer, "Revenue was 10.")
+
+    def test_question_numbers_are_canonical(self):
+        self.assertEqual(question_numbers("Debt of $1.2bn in FY24"), question_numbers("debt of $1,200m in 2024"))
+        self.assertNotEqual(question_numbers("growth of 5 percent"), question_numbers("growth of 6%"))
+
+
+if __name__ == "__main__":
+    unittest.main()
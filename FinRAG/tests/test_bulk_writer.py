@@ -0,0 +1,36 @@
+import time
+import unittest
+
+from finrag.bulk_writer import BulkWriter, is_duplicate_id_error
+from finrag.local_collection import InsertManyError, LocalCollection
+
+
+def rows(ids):
+    return [{"_id": i, "page_content": i, "$vector": [1.0, 0.0], "metadata": {}} for i in ids]
+
+
+class DuplicateIdTest(unittest.TestCase):
+    def test_local_collection_rejects_existing_ids(self):
+        collection = LocalCollection()
+        collection.insert_many(rows(["a"]))
+        with self.assertRaises(InsertManyError) as raised:
+            collection.insert_many(rows(["a", "b"]))
+        self.assertEqual(raised.exception.inserted_ids, ["b"])
+        self.assertTrue(is_duplicate_id_error(raised.exception))
+
+    def test_writer_upserts_existing_ids_without_backoff(self):
+        collection = LocalCollection()
+        collection.insert_many(rows(["a"]))
+        writer = BulkWriter(collection, batch_size=10, concurrency=1, max_retries=3, backoff_s=1.0)
+        update = rows(["a", "b", "c"])
+        update[0]["metadata"] = {"session_id": "new"}
+        started = time.perf_counter()
+        report = writer.write(update)
+        self.assertLess(time.perf_counter() - started, 0.5)
+        self.assertEqual((report.rows, report.retries, report.upserted), (3, 0, 1))
+        stored = {row["_id"]: row for row in collection.find()}
+        self.assertEqual(sorted(stored), ["a", "b", "c"])
+        self.assertEqual(stored["a"]["metadata"], {"session_id": "new"})
+
+if __name__ == "__main__":
+    unittest.main()
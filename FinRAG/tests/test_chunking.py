@@ -0,0 +1,67 @@
+import io
+import unittest
+from unittest import mock
+
+from langchain_core.documents import Document
+
+from finrag import ingest_service
+from finrag.chunking import StructuredChunker
+from finrag.local_vectorstore import LocalVectorStore
+from fakes import FakeEmbeddings, use_local_store
+
+
+def count_words(texts):
+    return [len(t.split()) for t in texts]
+
+
+class WordTokenizer:
+    """
+    Stands in for the embedding tokenizer behind hf_token_counter.
+    """
+
+    def __call__(self, texts, **kwargs):
+        return {"input_ids": [t.split() for t in texts]}
+
+
+class HeadingOnlyTextTest(unittest.TestCase):
+    def test_cover_page_is_kept(self):
+        chunker = StructuredChunker(count_words, max_tokens=50, min_tokens=5)
+        chunks = chunker.split_documents([
+            Document(page_content="ANNUAL REPORT 2024\nACME CORPORATION", metadata={"page": 0}),
+            Document(page_content="Revenue grew 8% on higher volumes across all regions.", metadata={"page": 1}),
+        ])
+        self.assertEqual(len(chunks), 2)
+        self.assertIn("ANNUAL REPORT 2024", chunks[0].page_content)
+        self.assertIn("ACME CORPORATION", chunks[0].page_content)
+        self.assertEqual(chunks[0].metadata["page"], 0)
+
+    def test_heading_with_body_is_one_chunk(self):
+        chunker = StructuredChunker(count_words, max_tokens=50, min_tokens=5)
+        chunks = chunker.split_text("NOTE 14 LEASES\nLease liabilities are measured at present value.")
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(chunks[0]["section_title"], "NOTE 14 LEASES")
+
+
+class CSVIngestionTest(unittest.TestCase):
+    def setUp(self):
+        self.store = LocalVectorStore(FakeEmbeddings())
+        use_local_store(self, self.store)
+        patches = [
+            mock.patch.object(ingest_service, "get_embedding_tokenizer", WordTokenizer),
+            mock.patch.object(ingest_service, "CHUNKER", "structured"),
+            mock.patch.object(ingest_service, "EMBEDDING_POOL_ENABLED", False),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def test_uppercase_columns_are_one_chunk_per_row(self):
+        upload = io.BytesIO(b"DATE,AMOUNT,CATEGORY\n2024-01-01,500,RENT\n2024-01-02,42,FOOD\n")
+        stored = ingest_service.ingest_file(upload, "expenses.csv", "alice", "alice-1")
+        self.assertEqual(stored, 2)
+        texts = sorted(d.page_content for d, _ in self.store.similarity_search_with_score("rent", k=5))
+        self.assertEqual(texts[0], "DATE: 2024-01-01\nAMOUNT: 500\nCATEGORY: RENT")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+
+from langchain_core.documents import Document
+
+from finrag.context_builder import build_context
+
+
+class CharTokenizer:
+    """
+    One token per character.
+    """
+
+    def __call__(self, texts, add_special_tokens=False):
+        return {"input_ids": [[ord(c) for c in text] for text in texts]}
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(i) for i in ids)
+
+
+def chunk(chunk_id, text, score):
+    return Document(page_content=text, metadata={"source": "r.pdf", "chunk_id": chunk_id, "relevance_score": score})
+
+
+OVERLAP = "Net debt was 1,200 million."
+FIRST = "Borrowings rose during the year. " + OVERLAP
+SECOND = OVERLAP + " Leverage fell to 2.1x EBITDA."
+
+
+class OverlapTest(unittest.TestCase):
+    def test_overlap_removed_when_both_neighbours_fit(self):
+        context, stats = build_context([chunk(1, SECOND, 0.9), chunk(0, FIRST, 0.8)], CharTokenizer(), 1000)
+        self.assertEqual(context.count(OVERLAP), 1)
+        self.assertEqual(stats["dedup_chars"], len(OVERLAP))
+
+    def test_overlap_kept_when_neighbour_is_dropped(self):
+        budget = len(SECOND) + 40  # room for the best chunk only
+        context, stats = build_context([chunk(1, SECOND, 0.9), chunk(0, FIRST, 0.8)], CharTokenizer(), budget)
+        self.assertEqual(stats["chunks_used"], 1)
+        self.assertIn(OVERLAP, context)
+
+
+if __name__ == "__main__":
+    unittest.main()
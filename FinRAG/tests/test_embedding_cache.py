@@ -0,0 +1,46 @@
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+
+from finrag.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class LengthEmbeddings:
+    def __init__(self):
+        self.embedded = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return [[float(len(t)), 1.0] for t in texts]
+
+
+class HitCountTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.base = LengthEmbeddings()
+        cache = EmbeddingCache(os.path.join(directory.name, "embeddings.sqlite3"), max_entries=100)
+        self.embeddings = CachedEmbeddings(self.base, cache, model_name="test")
+
+    def embed(self, texts):
+        log = io.StringIO()
+        with contextlib.redirect_stdout(log):
+            vectors = self.embeddings.embed_documents(texts)
+        return vectors, log.getvalue()
+
+    def test_repeats_in_a_cold_batch_are_not_hits(self):
+        vectors, log = self.embed(["a", "bb", "a", "ccc"])
+        self.assertEqual(self.base.embedded, ["a", "bb", "ccc"])
+        self.assertEqual([v[0] for v in vectors], [1.0, 2.0, 1.0, 3.0])
+        self.assertIn("0 hits, 3 embedded, 1 repeated in batch.", log)
+
+    def test_warm_batch_counts_every_cached_text(self):
+        self.embed(["a", "bb"])
+        _, log = self.embed(["a", "bb", "a", "dddd"])
+        self.assertIn("3 hits, 1 embedded.", log)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import importlib.util
+import os
+import sys
+import unittest
+
+# finsmart_common lives at the repository root, next to FinRAG
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from finsmart_common.inference_server import InferenceServer  # noqa: E402
+from finsmart_common.model_registry import ModelHandle  # noqa: E402
+
+HAS_TORCH = importlib.util.find_spec("torch") is not None
+
+
+class RecordingServer(InferenceServer):
+    """
+    Server whose batches are recorded instead of run on a model.
+    """
+
+    def __init__(self, **kwargs):
+        self.batches = []
+        super().__init__(ModelHandle(("fake", "cpu", "float32"), None, None, "cpu"), **kwargs)
+
+    def _run_batch(self, batch):
+        self.batches.append([r.prompt for r in batch])
+        for request in batch:
+            request.future.set_result(request.prompt.upper())
+
+
+class _Encoding(dict):
+    def to(self, device):
+        return self
+
+
+class CharTokenizer:
+    """
+    One token per character (its code point); pads with 0 on the requested side.
+    """
+    pad_token_id = 0
+    eos_token_id = 0
+
+    def __call__(self, prompts, return_tensors="pt", padding=True, padding_side="right"):
+        import torch
+        width = max(len(p) for p in prompts)
+        rows, masks = [], []
+        for prompt in prompts:
+            ids, pad = [ord(c) for c in prompt], [0] * (width - len(prompt))
+            rows.append(pad + ids if padding_side == "left" else ids + pad)
+            masks.append([0] * len(pad) + [1] * len(ids) if padding_side == "left" else [1] * len(ids) + [0] * len(pad))
+        return _Encoding(input_ids=torch.tensor(rows), attention_mask=torch.tensor(masks))
+
+    def decode(self, ids, skip_special_tokens=True):
+        return "".join(chr(int(i)) for i in ids if int(i) != 0)
+
+
+class NextCharModel:
+    """
+    Continues each row with the characters following its last input token.
+    """
+
+    def generate(self, input_ids, attention_mask, max_new_tokens, **kwargs):
+        import torch
+        last = input_ids[:, -1:]
+        steps = torch.arange(1, max_new_tokens + 1).unsqueeze(0)
+        return torch.cat([input_ids, last + steps], dim=1)
+
+
+class InferenceServerTest(unittest.TestCase):
+    def test_batches_group_by_sampling_settings(self):
+        server = RecordingServer(max_batch_size=2, window_ms=200)
+        futures = [
+            server.submit("a", temperature=0.1),
+            server.submit("b", temperature=0.5),
+            server.submit("c", temperature=0.1),
+            server.submit("d", temperature=0.1),
+        ]
+        self.assertEqual([f.result(timeout=5) for f in futures], ["A", "B", "C", "D"])
+        self.assertEqual(server.batches, [["a", "c"], ["b"], ["d"]])
+
+    @unittest.skipUnless(HAS_TORCH, "torch not installed")
+    def test_left_padded_batch_returns_each_requests_own_tokens(self):
+        handle = ModelHandle(("fake", "cpu", "float32"), CharTokenizer(), NextCharModel(), "cpu")
+        server = InferenceServer(handle, max_batch_size=4, window_ms=200)
+        short = server.submit("ab", max_new_tokens=2)
+        long = server.submit("hijk", max_new_tokens=3)
+        # Right padding would continue "ab" from a pad token; the prompt is never echoed
+        self.assertEqual(short.result(timeout=5), "cd")
+        self.assertEqual(long.result(timeout=5), "lmn")
+        self.assertEqual(server.metrics()["batches"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import io
+import unittest
+from unittest import mock
+
+from finrag import ingest_service
+from finrag.local_vectorstore import LocalVectorStore
+from fakes import FakeEmbeddings, use_local_store
+
+
+class TwoUsersSameFileTest(unittest.TestCase):
+    def setUp(self):
+        self.store = LocalVectorStore(FakeEmbeddings())
+        use_local_store(self, self.store)
+        patches = [
+            mock.patch.object(ingest_service, "CHUNKER", "recursive"),
+            mock.patch.object(ingest_service, "EMBEDDING_POOL_ENABLED", False),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def ingest(self, user_id, session_id):
+        upload = io.BytesIO(b"Revenue for 2024 was $1,200 million, up 8% year over year.")
+        return ingest_service.ingest_file(upload, "report.txt", user_id, session_id)
+
+    def test_second_user_does_not_overwrite_first(self):
+        self.assertEqual(self.ingest("alice", "alice-1"), 1)
+        self.assertEqual(self.ingest("bob", "bob-1"), 1)
+
+        alice = set(self.store.get_ids({"user_id": "alice"}))
+        bob = set(self.store.get_ids({"user_id": "bob"}))
+        self.assertEqual(len(alice), 1)
+        self.assertEqual(len(bob), 1)
+        self.assertFalse(alice & bob)
+
+    def test_reupload_by_same_user_is_unchanged(self):
+        self.ingest("alice", "alice-1")
+        ids = set(self.store.get_ids({"user_id": "alice"}))
+        self.ingest("alice", "alice-2")
+        self.assertEqual(set(self.store.get_ids({"user_id": "alice"})), ids)
+        self.assertEqual(self.store.count({"user_id": "alice", "session_id": "alice-2"}), 1)
+
+    def test_reupload_with_inserted_row_updates_positions(self):
+        ingest_service.ingest_file(io.BytesIO(b"item,value\nA,1\nB,2\n"), "table.csv", "alice", "alice-1")
+        ingest_service.ingest_file(io.BytesIO(b"item,value\nZ,0\nA,1\nB,2\n"), "table.csv", "alice", "alice-2")
+
+        stored = self.store.get_metadata({"user_id": "alice"}, ("row", "chunk_id", "session_id"))
+        self.assertEqual(
+            sorted((m["row"], m["chunk_id"]) for m in stored.values()),
+            [(0, 0), (1, 1), (2, 2)]
+        )
+        self.assertEqual({m["session_id"] for m in stored.values()}, {"alice-2"})
+
+
+if __name__ == "__main__":
+    unittest.main()
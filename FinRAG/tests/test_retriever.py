@@ -0,0 +1,52 @@
+import unittest
+from unittest import mock
+
+from langchain_core.documents import Document
+
+from finrag.lexical_index import get_lexical_registry
+from finrag.retriever import FinRAGRetriever
+
+
+class LowScoreStore:
+    """
+    Every dense result scores under the 0.35 threshold.
+    """
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def embed_queries(self, queries):
+        return [[1.0, 0.0] for _ in queries]
+
+    def similarity_search_with_score_by_vector(self, embedding, k=4, filter=None):
+        return [(Document(id=d.id, page_content=d.page_content, metadata={}), 0.1) for d in self.documents[:k]]
+
+
+class RewriteFallbackTest(unittest.TestCase):
+    def setUp(self):
+        self.documents = [
+            Document(id="c1", page_content="Revenue recognition policies are described in Note 2."),
+            Document(id="c2", page_content="Sales grew to 1,200 million in fiscal year 2024."),
+        ]
+        get_lexical_registry().create("rewrite-user", "s1").add(self.documents, ["c1", "c2"])
+        self.addCleanup(get_lexical_registry().drop_session, "rewrite-user", "s1")
+
+    def retriever(self, mode):
+        retriever = FinRAGRetriever(LowScoreStore(self.documents), hybrid=True, rewrite_mode=mode)
+        patch = mock.patch.object(retriever, "_search_with_variants", wraps=retriever._search_with_variants)
+        self.variants = patch.start()
+        self.addCleanup(patch.stop)
+        return retriever
+
+    def test_bm25_hits_alone_still_trigger_fallback(self):
+        docs = self.retriever("fallback").retrieve("What was revenue?", "rewrite-user", "s1")
+        self.assertEqual(self.variants.call_count, 1)
+        self.assertTrue(docs)
+
+    def test_off_mode_never_rewrites(self):
+        self.retriever("off").retrieve("What was revenue?", "rewrite-user", "s1")
+        self.variants.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+import io
+import unittest
+from unittest import mock
+
+from finrag import ingest_service
+from finrag.local_vectorstore import LocalVectorStore
+from finrag.session_reaper import SessionReaper
+from fakes import FakeEmbeddings, use_local_store
+
+
+class SupersedeOrderTest(unittest.TestCase):
+    def setUp(self):
+        self.store = LocalVectorStore(FakeEmbeddings())
+        use_local_store(self, self.store)
+        self.reaper = SessionReaper(ttl_s=3600, max_deletes_per_s=0)
+        patches = [
+            mock.patch.object(ingest_service, "get_session_reaper", lambda: self.reaper),
+            mock.patch.object(ingest_service, "CHUNKER", "recursive"),
+            mock.patch.object(ingest_service, "EMBEDDING_POOL_ENABLED", False),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def ingest(self, session_id, text):
+        return ingest_service.ingest_file(io.BytesIO(text), f"{session_id}.txt", "alice", session_id)
+
+    def chunks(self, session_id):
+        return self.store.count({"user_id": "alice", "session_id": session_id})
+
+    def test_newer_upload_finishing_first_is_kept(self):
+        # sA submitted first, sB second; sB finishes first
+        self.reaper.register("alice", "sA")
+        self.reaper.register("alice", "sB")
+        self.ingest("sB", b"Revenue for 2024 was $1,200 million.")
+        self.ingest("sA", b"Revenue for 2023 was $1,100 million.")
+        self.reaper.reap()
+        self.assertEqual(self.chunks("sB"), 1)
+        self.assertEqual(self.chunks("sA"), 0)
+
+    def test_uploads_in_order_keep_the_last(self):
+        self.ingest("sA", b"Revenue for 2023 was $1,100 million.")
+        self.ingest("sB", b"Revenue for 2024 was $1,200 million.")
+        self.reaper.reap()
+        self.assertEqual(self.chunks("sB"), 1)
+        self.assertEqual(self.chunks("sA"), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
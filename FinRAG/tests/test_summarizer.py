@@ -0,0 +1,51 @@
+import unittest
+
+from finrag.summarizer import ChunkGroups, asks_for_document_summary
+
+
+class ChunkGroupsTest(unittest.TestCase):
+    def test_short_document_keeps_every_group(self):
+        groups = ChunkGroups(group_chars=10, max_groups=4)
+        for text in ["aaaa", "bbbb", "cccc", "dddd"]:
+            groups.add(text)
+        self.assertEqual(groups.finish(), (["aaaa\nbbbb", "cccc\ndddd"], 2))
+
+    def test_long_document_is_bounded_and_evenly_spaced(self):
+        groups = ChunkGroups(group_chars=5, max_groups=8)
+        for i in range(1000):
+            groups.add(f"{i:05d}")
+        kept, total = groups.finish()
+        self.assertEqual(total, 1000)
+        self.assertLessEqual(len(kept), 8)
+        self.assertGreaterEqual(len(kept), 4)
+        self.assertEqual(kept[0], "00000")
+        positions = [int(text) for text in kept]
+        gaps = {b - a for a, b in zip(positions, positions[1:])}
+        self.assertEqual(len(gaps), 1)
+        self.assertGreater(positions[-1], 500)
+
+
+class SummaryRequestTest(unittest.TestCase):
+    def test_whole_document_requests(self):
+        for question in [
+            "Summarize the report",
+            "Please summarise this document.",
+            "Give me a brief overview of the filing",
+            "What is this report about?",
+            "Key takeaways",
+            "tl;dr",
+        ]:
+            self.assertTrue(asks_for_document_summary(question), question)
+
+    def test_specific_questions_are_retrieved(self):
+        for question in [
+            "What does the report say about Note 14?",
+            "Briefly, what was revenue in 2024?",
+            "Summarize the lease note",
+            "Give a brief answer: what is EBITDA?",
+        ]:
+            self.assertFalse(asks_for_document_summary(question), question)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,29 +1,38 @@
-import torch
-from transformers import AutoTokenizer, AutoModelForCausalLM
+import os
+import sys
 import streamlit as st
 
+# Repository root: the model registry is shared with FinRAG
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from finsmart_common.model_registry import get_model_registry
+from finsmart_common.inference_server import get_inference_server
+
+MODEL_NAME = "Shiva-k22/gemma-FinAI"
+
 # Global cache for the model
 @st.cache_resource
 def load_model():
-    model_name = "Shiva-k22/gemma-FinAI"
-    
-    # Determine device
-    if torch.backends.mps.is_available():
-        device = "mps"
-    elif torch.cuda.is_available():
-        device = "cuda"
-    else:
-        device = "cpu"
-        
-    print(f"Loading model on {device}...")
-    
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    model = AutoModelForCausalLM.from_pretrained(
-        model_name,
-        torch_dtype=torch.float16 if device != "cpu" else torch.float32
-    ).to(device)
+    # Device and precision policy live in the registry (MODEL_PRECISION env, else float16 on CUDA only)
+    handle = get_model_registry().acquire(MODEL_NAME)
+    print(f"Model loaded on {handle.device}.")
+    for entry in get_model_registry().memory_report():
+        print(f"Model memory: {entry}")
     
-    return tokenizer, model, device
+    return handle.tokenizer, handle.model, handle.device
+
+@st.cache_resource
+def warm_up_model():
+    """
+    Starts loading the model on a background thread, once per process.
+    load_model() / call_llm() wait for it if called before it finishes.
+    """
+    return get_model_registry().warm_up(MODEL_NAME)
+
+def model_ready() -> bool:
+    return get_model_registry().is_loaded(MODEL_NAME)
+
+def model_load_seconds():
+    return get_model_registry().load_seconds(MODEL_NAME)
 
 # Helper function to serve as 'call_llm'
 def call_llm(prompt: str, max_tokens: int = 500, temperature: float = 0.1) -> str:
@@ -31,46 +40,17 @@ def call_llm(prompt: str, max_tokens: int = 500, temperature: float = 0.1) -> st
     Generates a response from the LLM based on the prompt.
     This acts as the bridge between logic modules and the model.
     """
-    tokenizer, model, device = load_model()
-    
-    inputs = tokenizer(prompt, return_tensors="pt").to(device)
-    
-    with torch.no_grad():
-        outputs = model.generate(
-            **inputs,
-            max_new_tokens=max_tokens,
-            do_sample=True,
-            temperature=temperature,
-            top_p=0.95
-        )
-        
-    response = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    
-    # Simple post-processing to strip the prompt from the output if the model repeats it
-    # (Gemma sometimes repeats the prompt, but usually decode(skip_special_tokens=True) handles it.
-    # However, for safety, let's just return the raw decode and let logic filter if needed, 
-    # or try to split if the prompt is explicitly echoed.)
-    
-    # A cleaner approach for instruction models:
-    # If the prompt ends with specific token, we might parse. 
-    # For now, we return specific substring if prompt is echoed, 
-    # but 'decode' usually gives full text.
-    
-    # Heuristic: verify if response starts with prompt and strip it
-    if response.startswith(prompt):
-        response = response[len(prompt):].strip()
-        
-    # Another common pattern is "User: ... Model: ..." or similar.
-    # But since we control the prompt, we assume we get the full text.
-    # Let's rely on the prompt structure forcing clean output.
-    
-    # NOTE: The notebook used `response = call_llm(prompt)`.
-    # We strip the prompt part to return only the generated answer.
-    # Since `inputs` are passed, `generate` returns full sequence (prompt+completion).
+    load_model()
     
-    input_len = inputs["input_ids"].shape[1]
-    generated_tokens = outputs[0][input_len:]
-    clean_response = tokenizer.decode(generated_tokens, skip_special_tokens=True)
+    # Queued on the shared inference worker: concurrent sessions are batched into one
+    # generate() call, and only the generated text comes back (no prompt echo to strip)
+    clean_response = get_inference_server(MODEL_NAME).generate(
+        prompt,
+        max_new_tokens=max_tokens,
+        do_sample=True,
+        temperature=temperature,
+        top_p=0.95
+    )
     
     # ---------------------------------------------------------
     # Safety Boilerplate Cleaner
@@ -1,13 +1,17 @@
+import time
+_import_started = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import re
 import math
-from model_loader import load_model, call_llm
+from model_loader import warm_up_model, model_ready, model_load_seconds, call_llm
 from expenses_categorizer import categorize_expenses
 from savings_analysis import savings_analysis
 from budget_recommendation import analyze_cash_flow_and_savings
 from investment_advisor import generate_investment_guidance, investment_advisor_json
+# plotly is imported where the charts are drawn (heavy, and only needed after an upload)
+IMPORT_SECONDS = time.perf_counter() - _import_started
 
 # Page Config
 st.set_page_config(
@@ -26,14 +30,16 @@ with st.sidebar:
     st.caption("Your AI-powered Financial Assistant")
     st.markdown("---")
     
-    # Load model
-    if 'model_loaded' not in st.session_state:
-        with st.spinner("Loading AI Model (Shiva-k22/gemma-FinAI)..."):
-            load_model()
-            st.session_state.model_loaded = True
-        st.success("Model Loaded Successfully!")
+    # Load model in the background: the page renders while it warms up
+    warm_up_model()
+    if 'startup_reported' not in st.session_state:
+        st.session_state.startup_reported = True
+        print(f"Startup: app imports took {IMPORT_SECONDS:.2f}s (model warming up in background)")
+    if model_ready():
+        st.success(f"Model Active ✅ (loaded in {model_load_seconds():.1f}s)")
     else:
-        st.success("Model Active ✅")
+        st.info("Loading AI Model (Shiva-k22/gemma-FinAI) in the background...")
+    st.caption(f"App imports: {IMPORT_SECONDS:.2f}s")
 
     st.markdown("### How to use:")
     st.info(
@@ -383,6 +389,7 @@ if query:
                     df = pd.DataFrame(list(breakdown.items()), columns=["Category", "Amount"])
                     
                     with col_a:
+                        import plotly.express as px
                         fig = px.pie(df, names="Category", values="Amount", title="Expense Distribution", hole=0.4)
                         st.plotly_chart(fig, use_container_width=True)
                     
@@ -401,6 +408,7 @@ if query:
                 if "recommended_allocation" in inv and inv["recommended_allocation"]:
                     st.subheader("📈 Recommended Asset Allocation")
                     alloc_df = pd.DataFrame(inv["recommended_allocation"])
+                    import plotly.express as px
                     fig_inv = px.bar(alloc_df, x="instrument", y="allocation_percent", color="risk_level", title="Portfolio Mix")
                     st.plotly_chart(fig_inv, use_container_width=True)
                     
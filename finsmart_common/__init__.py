@@ -0,0 +1,4 @@
+"""
+Code shared by the FinRAG and Fin_Personal_Assitant apps.
+Each app puts the repository root on sys.path before importing from here.
+"""
@@ -0,0 +1,179 @@
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from finsmart_common.model_registry import ModelHandle, RegistryKey, get_model_registry
+
+# Largest batch per generate() call, and how long the first request waits for company
+MAX_BATCH_SIZE = int(os.getenv("INFERENCE_MAX_BATCH_SIZE", "8"))
+BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "15"))
+
+
+@dataclass
+class GenerationRequest:
+    prompt: str
+    max_new_tokens: int
+    temperature: float
+    top_p: float
+    do_sample: bool
+    repetition_penalty: float
+    future: Future = field(default_factory=Future)
+    enqueued_at: float = field(default_factory=time.perf_counter)
+
+    @property
+    def batch_key(self) -> Tuple:
+        # Requests can share a generate() call only with identical sampling settings
+        return (self.temperature, self.top_p, self.do_sample, self.repetition_penalty)
+
+
+class InferenceServer:
+    """
+    Single worker that owns generate() for one loaded model.
+
+    Requests from all sessions are queued; the worker takes the first one, waits up to
+    BATCH_WINDOW_MS for more with the same sampling settings, left-pads the prompts
+    into one batch and resolves each request's future with its own generated text.
+    The batch runs to the largest max_new_tokens in it; each output is cut to its
+    request's limit.
+
+    Callers that must run the model outside the queue (token streaming) hold
+    `model_lock` while they do, so the model never runs two generate() calls at once.
+    """
+
+    def __init__(self, handle: ModelHandle, max_batch_size: int = MAX_BATCH_SIZE, window_ms: float = BATCH_WINDOW_MS):
+        self.handle = handle
+        self.max_batch_size = max_batch_size
+        self.window_s = window_ms / 1000
+        self.model_lock = threading.Lock()
+        self._queue: "queue.Queue[GenerationRequest]" = queue.Queue()
+        # Requests taken off the queue but left for a later batch (different settings)
+        self._deferred: Deque[GenerationRequest] = deque()
+        self._metrics_lock = threading.Lock()
+        self._metrics = {"requests": 0, "batches": 0, "generated_tokens": 0, "busy_s": 0.0, "queue_wait_s": 0.0}
+        self._worker = threading.Thread(target=self._loop, name="finsmart-inference", daemon=True)
+        self._worker.start()
+
+    def submit(
+        self,
+        prompt: str,
+        max_new_tokens: int = 500,
+        temperature: float = 0.1,
+        top_p: float = 0.95,
+        do_sample: bool = True,
+        repetition_penalty: float = 1.0,
+    ) -> Future:
+        """
+        Queues a prompt; the future resolves to the generated text (prompt not included).
+        """
+        request = GenerationRequest(prompt, max_new_tokens, temperature, top_p, do_sample, repetition_penalty)
+        self._queue.put(request)
+        return request.future
+
+    def generate(self, prompt: str, **kwargs) -> str:
+        return self.submit(prompt, **kwargs).result()
+
+    def _next_batch(self) -> List[GenerationRequest]:
+        first = self._deferred.popleft() if self._deferred else self._queue.get()
+        batch = [first]
+        skipped: List[GenerationRequest] = []
+
+        # Compatible deferred requests join first, then whatever arrives within the window
+        while self._deferred and len(batch) < self.max_batch_size:
+            request = self._deferred.popleft()
+            (batch if request.batch_key == first.batch_key else skipped).append(request)
+        deadline = time.perf_counter() + self.window_s
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                request = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            (batch if request.batch_key == first.batch_key else skipped).append(request)
+
+        self._deferred.extendleft(reversed(skipped))
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._next_batch()
+            batch = [r for r in batch if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                for request in batch:
+                    request.future.set_exception(e)
+
+    def _run_batch(self, batch: List[GenerationRequest]):
+        import torch
+
+        tokenizer, model, device = self.handle.tokenizer, self.handle.model, self.handle.device
+        pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        started = time.perf_counter()
+
+        # Left padding keeps every prompt's last token adjacent to its first generated one
+        inputs = tokenizer(
+            [r.prompt for r in batch], return_tensors="pt", padding=True, padding_side="left"
+        ).to(device)
+        first = batch[0]
+        with self.model_lock, torch.no_grad():
+            outputs = model.generate(
+                **inputs,
+                max_new_tokens=max(r.max_new_tokens for r in batch),
+                do_sample=first.do_sample,
+                temperature=first.temperature,
+                top_p=first.top_p,
+                repetition_penalty=first.repetition_penalty,
+                pad_token_id=pad_token_id,
+            )
+
+        generated = outputs[:, inputs["input_ids"].shape[1]:]
+        tokens = 0
+        for request, ids in zip(batch, generated):
+            ids = ids[:request.max_new_tokens]
+            tokens += int((ids != pad_token_id).sum())
+            request.future.set_result(tokenizer.decode(ids, skip_special_tokens=True))
+
+        elapsed = time.perf_counter() - started
+        with self._metrics_lock:
+            self._metrics["requests"] += len(batch)
+            self._metrics["batches"] += 1
+            self._metrics["generated_tokens"] += tokens
+            self._metrics["busy_s"] += elapsed
+            self._metrics["queue_wait_s"] += sum(started - r.enqueued_at for r in batch)
+        print(f"Inference batch: {len(batch)} requests, {tokens} tokens in {elapsed:.2f}s")
+
+    def metrics(self) -> Dict[str, float]:
+        with self._metrics_lock:
+            m = dict(self._metrics)
+        m["queue_depth"] = self._queue.qsize() + len(self._deferred)
+        m["mean_batch_size"] = m["requests"] / m["batches"] if m["batches"] else 0.0
+        m["tokens_per_s"] = m["generated_tokens"] / m["busy_s"] if m["busy_s"] else 0.0
+        m["mean_queue_wait_ms"] = 1000 * m["queue_wait_s"] / m["requests"] if m["requests"] else 0.0
+        return m
+
+
+_servers: Dict[RegistryKey, InferenceServer] = {}
+_servers_lock = threading.Lock()
+
+
+def get_inference_server(model_name: str, device: Optional[str] = None, precision: Optional[str] = None) -> InferenceServer:
+    """
+    Process-wide server per model (shares the registry's loaded copy).
+    """
+    handle = get_model_registry().acquire(model_name, device=device, precision=precision)
+    with _servers_lock:
+        server = _servers.get(handle.key)
+        if server is None:
+            server = _servers[handle.key] = InferenceServer(handle)
+        else:
+            handle.release()  # the server already holds a reference
+        return server
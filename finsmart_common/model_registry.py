@@ -0,0 +1,250 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# torch / transformers are imported on first load, so importing this module (and
+# rendering the first page of either app) does not pay for them.
+
+RegistryKey = Tuple[str, str, str]  # (model_name, device, precision)
+
+# "int8" = float32 weights with Linear layers dynamically quantized (CPU only)
+PRECISIONS = ("float32", "float16", "bfloat16", "int8")
+
+# Local safetensors snapshots written by `python -m finsmart_common.prepare_model`
+SNAPSHOT_DIR = os.getenv(
+    "MODEL_SNAPSHOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".cache", "models")
+)
+
+
+def snapshot_path(model_name: str, precision: str) -> str:
+    # int8 is quantized at load time from float32 weights
+    stored = "float32" if precision == "int8" else precision
+    return os.path.join(SNAPSHOT_DIR, model_name.replace("/", "__"), stored)
+
+
+def default_device() -> str:
+    import torch
+    if torch.backends.mps.is_available():
+        return "mps"
+    if torch.cuda.is_available():
+        return "cuda"
+    return "cpu"
+
+
+def default_precision(device: str) -> str:
+    """
+    One precision policy for every app: MODEL_PRECISION if set, else half precision
+    only on CUDA. MPS stays float32 (float16 produced empty generations with Gemma).
+    """
+    configured = os.getenv("MODEL_PRECISION")
+    if configured:
+        return configured
+    return "float16" if device == "cuda" else "float32"
+
+
+def _load_model(model_name: str, device: str, precision: str):
+    """
+    Loads from the local snapshot when one was prepared: safetensors are memory-mapped
+    and low_cpu_mem_usage skips the random-init pass, so weights are read only once.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision {precision!r}, expected one of {PRECISIONS}")
+    import torch
+    from transformers import AutoModelForCausalLM
+
+    snapshot = snapshot_path(model_name, precision)
+    source = snapshot if os.path.isdir(snapshot) else model_name
+    dtype = torch.float32 if precision == "int8" else getattr(torch, precision)
+    model = AutoModelForCausalLM.from_pretrained(source, torch_dtype=dtype, low_cpu_mem_usage=True)
+    if precision == "int8":
+        # Linear weights stored as int8, activations quantized per batch at run time
+        return torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model.to(device)
+
+
+def prepare_snapshot(model_name: str, precision: str) -> str:
+    """
+    One-time step: writes the model (in `precision`) and tokenizer as a local
+    safetensors snapshot that _load_model picks up. Returns the snapshot path.
+    """
+    import torch
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+
+    path = snapshot_path(model_name, precision)
+    dtype = torch.float32 if precision == "int8" else getattr(torch, precision)
+    model = AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=dtype, low_cpu_mem_usage=True)
+    model.save_pretrained(path, safe_serialization=True)
+    AutoTokenizer.from_pretrained(model_name).save_pretrained(path)
+    return path
+
+
+def _tensor_bytes(model) -> int:
+    # state_dict also covers packed int8 Linear weights, which are not parameters()
+    import torch
+    total = 0
+    for value in model.state_dict().values():
+        for tensor in (value if isinstance(value, tuple) else (value,)):
+            if torch.is_tensor(tensor):
+                total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        import psutil
+        return psutil.Process(os.getpid()).memory_info().rss
+    except ImportError:
+        return None
+
+
+@dataclass
+class ModelHandle:
+    """
+    A reference to a loaded model. Tokenizer and model share one lifetime:
+    both stay loaded until the last handle is released.
+    """
+    key: RegistryKey
+    tokenizer: object
+    model: object
+    device: str
+
+    def release(self):
+        get_model_registry().release(self)
+
+
+class _Entry:
+    def __init__(self, tokenizer, model, device: str, rss_delta: Optional[int], load_s: float):
+        self.tokenizer = tokenizer
+        self.model = model
+        self.device = device
+        self.rss_delta = rss_delta
+        self.load_s = load_s
+        self.refs = 0
+
+
+class ModelRegistry:
+    """
+    Process-wide causal LM registry: each (model, device, precision) is loaded once and
+    shared by every caller (FinRAG and the personal assistant), with reference counts.
+    """
+
+    def __init__(self):
+        self._entries: Dict[RegistryKey, _Entry] = {}
+        # acquire() arguments -> the key they resolved to, so readiness checks need no torch
+        self._resolved: Dict[Tuple[str, Optional[str], Optional[str]], RegistryKey] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def resolve_key(model_name: str, device: Optional[str] = None, precision: Optional[str] = None) -> RegistryKey:
+        precision = precision or default_precision(device or default_device())
+        # Dynamic int8 kernels are CPU kernels
+        device = "cpu" if precision == "int8" else (device or default_device())
+        return (model_name, device, precision)
+
+    def acquire(
+        self, model_name: str, device: Optional[str] = None, precision: Optional[str] = None
+    ) -> ModelHandle:
+        key = self.resolve_key(model_name, device, precision)
+        self._resolved[(model_name, device, precision)] = key
+        _, device, precision = key
+
+        # Loading holds the lock: concurrent first callers wait instead of loading twice
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                from transformers import AutoTokenizer
+
+                print(f"Loading {model_name} on {device} ({precision})...")
+                started = time.perf_counter()
+                rss_before = _rss_bytes()
+                snapshot = snapshot_path(model_name, precision)
+                tokenizer = AutoTokenizer.from_pretrained(snapshot if os.path.isdir(snapshot) else model_name)
+                model = _load_model(model_name, device, precision)
+                model.eval()
+                rss_after = _rss_bytes()
+                rss_delta = rss_after - rss_before if rss_before is not None else None
+                load_s = time.perf_counter() - started
+                print(f"Loaded {model_name} ({precision}) in {load_s:.1f}s")
+                entry = self._entries[key] = _Entry(tokenizer, model, device, rss_delta, load_s)
+            entry.refs += 1
+            return ModelHandle(key, entry.tokenizer, entry.model, entry.device)
+
+    def release(self, handle: ModelHandle):
+        """
+        Drops one reference; the model is unloaded when none remain.
+        """
+        with self._lock:
+            entry = self._entries.get(handle.key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs <= 0:
+                del self._entries[handle.key]
+                if entry.device == "cuda":
+                    import torch
+                    torch.cuda.empty_cache()
+                print(f"Unloaded {handle.key[0]} ({handle.key[1]}, {handle.key[2]})")
+
+    def memory_report(self) -> List[Dict[str, object]]:
+        """
+        Per loaded model: references, weight/buffer bytes and the process RSS growth
+        measured while it loaded (None without psutil).
+        """
+        report = []
+        with self._lock:
+            for (name, device, precision), entry in self._entries.items():
+                report.append({
+                    "model": name,
+                    "device": device,
+                    "precision": precision,
+                    "refs": entry.refs,
+                    "weights_mb": _tensor_bytes(entry.model) / 2**20,
+                    "rss_delta_mb": entry.rss_delta / 2**20 if entry.rss_delta is not None else None,
+                    "load_s": entry.load_s,
+                })
+        return report
+
+    def is_loaded(self, model_name: str, device: Optional[str] = None, precision: Optional[str] = None) -> bool:
+        # No lock: it is held for the whole load, and this is polled by the UI meanwhile.
+        # Arguments never acquired cannot be loaded; answered without resolving the device.
+        key = self._resolved.get((model_name, device, precision))
+        return key is not None and key in self._entries
+
+    def load_seconds(
+        self, model_name: str, device: Optional[str] = None, precision: Optional[str] = None
+    ) -> Optional[float]:
+        key = self._resolved.get((model_name, device, precision))
+        entry = self._entries.get(key) if key is not None else None
+        return entry.load_s if entry is not None else None
+
+    def warm_up(
+        self, model_name: str, device: Optional[str] = None, precision: Optional[str] = None
+    ) -> threading.Thread:
+        """
+        Loads the model on a background thread (the registry keeps that reference),
+        so the UI renders right away; an acquire() meanwhile waits for the load.
+        """
+        def _load():
+            try:
+                self.acquire(model_name, device, precision)
+            except Exception as e:
+                print(f"Model warm-up failed: {e}")
+
+        thread = threading.Thread(target=_load, name="finsmart-warmup", daemon=True)
+        thread.start()
+        return thread
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
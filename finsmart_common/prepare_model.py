@@ -0,0 +1,31 @@
+"""
+One-time "prepare" step: writes a local safetensors snapshot of the LLM in the chosen
+precision, which both apps then load memory-mapped (see model_registry.SNAPSHOT_DIR).
+
+    python -m finsmart_common.prepare_model [--model Shiva-k22/gemma-FinAI] [--precision bfloat16]
+"""
+import argparse
+import os
+import time
+
+from finsmart_common.model_registry import PRECISIONS, default_device, default_precision, prepare_snapshot
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="Shiva-k22/gemma-FinAI")
+    parser.add_argument("--precision", choices=PRECISIONS, default=None,
+                        help="defaults to MODEL_PRECISION / the registry policy for this host")
+    args = parser.parse_args()
+
+    precision = args.precision or default_precision(default_device())
+    started = time.perf_counter()
+    path = prepare_snapshot(args.model, precision)
+    size_mb = sum(
+        os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+    ) / 2**20
+    print(f"Snapshot of {args.model} ({precision}) written to {path}: {size_mb:.0f} MB in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()